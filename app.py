@@ -16,8 +16,12 @@ tiles = [
     ("05_Hiring_Manager_Toolkit.py",     "🧰", "Hiring Manager Toolkit",          "Playbook, onboarding steps, expectations."),
     ("06_Interview_Feedback_Collector.py","🗒️","Interview Feedback Collector",    "Capture interview outcomes to a log.")
 ]
-long_tile = ("07_Shortlisting_Summary_Tool.py", "🧮", "Shortlisting Summary Tool",
-             "Upload up to five CVs + a JD to generate an executive comparison.")
+long_tiles = [
+    ("07_Shortlisting_Summary_Tool.py", "🧮", "Shortlisting Summary Tool",
+     "Upload a JD + any number of CVs to generate an executive comparison."),
+    ("09_Hiring_Pack.py", "📦", "Hiring Pack",
+     "One JD in, advert + interview guide + questions + HM toolkit out, generated together."),
+]
 
 html_parts = ['<div class="tile-grid">']
 for page_file, emoji, title, desc in tiles:
@@ -33,8 +37,8 @@ for page_file, emoji, title, desc in tiles:
 </a>
 """))
 
-lp, lemoji, ltitle, ldesc = long_tile
-html_parts.append(dedent(f"""\
+for lp, lemoji, ltitle, ldesc in long_tiles:
+    html_parts.append(dedent(f"""\
 <a class="tile long" href="/?page={lp}">
   <div class="emoji">{lemoji}</div>
   <div>
@@ -0,0 +1,58 @@
+﻿"""
+Run the offline benchmark suite and emit one JSON report.
+
+    python -m benchmarks [--suites llm parsers docx persistence startup] [--rows 10000 100000 1000000] [--out bench.json]
+
+No network or API key is needed: LLM calls go to benchmarks.fake_openai and all
+databases and caches live in a temporary directory.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from benchmarks import bench_docx, bench_llm, bench_parsers, bench_persistence, bench_startup
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--suites", nargs="+", default=["llm", "parsers", "docx", "persistence", "startup"],
+                    choices=["llm", "parsers", "docx", "persistence", "startup"])
+    ap.add_argument("--calls", type=int, default=20, help="LLM calls per scenario")
+    ap.add_argument("--latency", type=float, default=0.05, help="fake server delay before the first token (s)")
+    ap.add_argument("--rate-limit-every", type=int, default=7, help="answer every Nth batch request with a 429")
+    ap.add_argument("--sizes", nargs="+", default=["small", "medium", "large"], help="corpus sizes for the parser suite")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="feedback table sizes")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", help="write the report here instead of stdout")
+    args = ap.parse_args()
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": vars(args),
+        "results": {},
+    }
+    if "llm" in args.suites:
+        report["results"]["llm"] = bench_llm.run(calls=args.calls, latency=args.latency, rate_limit_every=args.rate_limit_every)
+    if "parsers" in args.suites:
+        report["results"]["parsers"] = bench_parsers.run(sizes=args.sizes, repeat=args.repeat)
+    if "docx" in args.suites:
+        report["results"]["docx"] = bench_docx.run(repeat=args.repeat)
+    if "persistence" in args.suites:
+        report["results"]["persistence"] = bench_persistence.run(rows=args.rows, repeat=args.repeat)
+    if "startup" in args.suites:
+        report["results"]["startup"] = bench_startup.run(reruns=args.repeat)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+﻿"""
+Compare the streaming DOCX extractor in utils.parsers with the python-docx object model.
+
+    python -m benchmarks.bench_docx [--paragraphs 2000] [--rows 500] [--repeat 5]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from io import BytesIO
+
+from utils.parsers import extract_bytes
+
+
+def make_docx(paragraphs: int, rows: int) -> bytes:
+    from docx import Document
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Paragraph {i}: delivered cross-functional projects with measurable outcomes.")
+    table = doc.add_table(rows=rows, cols=3)
+    for r, row in enumerate(table.rows):
+        row.cells[0].text = f"20{r % 25:02d}"
+        row.cells[1].text = f"Company {r}"
+        row.cells[2].text = "Senior Engineer, led a team of five"
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def python_docx_text(data: bytes) -> str:
+    from docx import Document
+    return "\n".join(p.text for p in Document(BytesIO(data)).paragraphs)
+
+
+def fast_text(data: bytes) -> str:
+    return extract_bytes("bench.docx", data)
+
+
+def measure(fn, data: bytes, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        text = fn(data)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_s": min(times), "mean_s": sum(times) / len(times), "peak_bytes": peak, "chars": len(text)}
+
+
+def run(paragraphs: int = 2000, rows: int = 500, repeat: int = 5) -> dict:
+    data = make_docx(paragraphs, rows)
+    return {
+        "file_bytes": len(data),
+        "paragraphs": paragraphs,
+        "table_rows": rows,
+        "python_docx": measure(python_docx_text, data, repeat),
+        "streaming": measure(fast_text, data, repeat),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--paragraphs", type=int, default=2000)
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    result = {"benchmark": "docx_extract", **run(args.paragraphs, args.rows, args.repeat)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+﻿"""
+Benchmark utils.llm against the local fake OpenAI server: cold vs cached completions,
+streaming time-to-first-token, batch throughput with injected 429s, and the share of
+prompt tokens a provider prefix cache can serve for shortlist map prompts.
+
+    python -m benchmarks.bench_llm [--calls 20] [--latency 0.05] [--token-delay 0.001] [--rate-limit-every 7]
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import isolated_data, summarise
+from benchmarks.corpus import lines
+from benchmarks.fake_openai import FakeOpenAI
+
+MODEL = "gpt-4o-mini"
+
+
+def _messages(i: int):
+    return [
+        {"role": "system", "content": "You are an HR assistant."},
+        {"role": "user", "content": f"Draft a job advert for role #{i}. " + "Context. " * 200},
+    ]
+
+
+def _prefix_cache_share(fake: FakeOpenAI, calls: int, jd_first: bool) -> float:
+    """Cached share of prompt tokens over `calls` map prompts sharing one JD, as the provider would report it."""
+    from utils import llm
+    from utils.shortlist import map_messages
+
+    jd = "\n".join(lines(300, seed=1))
+    prompt = cached = 0
+    for i in range(calls):
+        cv = "\n".join(lines(60, seed=1000 + i + (0 if jd_first else 10_000)))
+        messages = map_messages(jd, f"Candidate {i}", cv, "Leadership")
+        if not jd_first:
+            # The pre-template layout: candidate and CV ahead of the shared JD
+            messages = [messages[0], {"role": "user", "content": f"CANDIDATE: Candidate {i}\nCV:\n{cv}\n\n{messages[1]['content']}"}]
+        _, usage = llm._create_completion(MODEL, messages, 0.2, 50)
+        prompt += usage["prompt_tokens"] or 0
+        cached += usage["cached_tokens"] or 0
+    return cached / prompt if prompt else 0.0
+
+
+def run(calls: int = 20, latency: float = 0.05, token_delay: float = 0.001, completion_tokens: int = 200,
+        rate_limit_every: int = 7, workers: int = 8) -> dict:
+    from utils import llm
+
+    results = {}
+    with FakeOpenAI(latency=latency, token_delay=token_delay, completion_tokens=completion_tokens) as fake, \
+            isolated_data(fake.base_url):
+        cold, warm = [], []
+        for i in range(calls):
+            t0 = time.perf_counter()
+            out = llm.chat_complete(MODEL, _messages(i), max_tokens=completion_tokens)
+            cold.append(time.perf_counter() - t0)
+            assert not out.startswith("[ERROR]"), out
+        for i in range(calls):
+            t0 = time.perf_counter()
+            llm.chat_complete(MODEL, _messages(i), max_tokens=completion_tokens)
+            warm.append(time.perf_counter() - t0)
+        results["complete_cold"] = summarise(cold)
+        results["complete_cached"] = summarise(warm)
+
+        ttft, total = [], []
+        for i in range(calls):
+            t0 = time.perf_counter()
+            first = None
+            for _ in llm.chat_stream(MODEL, _messages(calls + i), max_tokens=completion_tokens, use_cache=False):
+                if first is None:
+                    first = time.perf_counter() - t0
+            ttft.append(first or 0.0)
+            total.append(time.perf_counter() - t0)
+        results["stream_ttft"] = summarise(ttft)
+        results["stream_total"] = summarise(total)
+
+        t0 = time.perf_counter()
+        for i in range(calls):
+            llm.chat_complete(MODEL, _messages(2 * calls + i), max_tokens=completion_tokens, use_cache=False)
+        sequential_s = time.perf_counter() - t0
+
+        fake.rate_limit_every = rate_limit_every
+        limited_before = fake.rate_limited
+        t0 = time.perf_counter()
+        batch = llm.chat_complete_many(
+            [{"model": MODEL, "messages": _messages(3 * calls + i), "max_tokens": completion_tokens} for i in range(calls)],
+            max_workers=workers, use_cache=False,
+        )
+        batch_s = time.perf_counter() - t0
+        results["batch"] = {
+            "calls": calls,
+            "workers": workers,
+            "sequential_s": sequential_s,
+            "concurrent_s": batch_s,
+            "speedup": sequential_s / batch_s if batch_s else None,
+            "rate_limited": fake.rate_limited - limited_before,
+            "failed": sum(1 for r in batch if r["error"] is not None),
+            "attempts": sum(r["attempts"] for r in batch),
+        }
+        fake.rate_limit_every = 0
+        results["prompt_prefix_cache"] = {
+            "calls": calls,
+            "jd_first_cached_share": _prefix_cache_share(fake, calls, jd_first=True),
+            "cv_first_cached_share": _prefix_cache_share(fake, calls, jd_first=False),
+        }
+        results["server_requests"] = fake.requests
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--calls", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--token-delay", type=float, default=0.001)
+    ap.add_argument("--completion-tokens", type=int, default=200)
+    ap.add_argument("--rate-limit-every", type=int, default=7)
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+    params = vars(args)
+    print(json.dumps({"benchmark": "llm", "params": params, "results": run(**params)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+﻿"""
+Benchmark text extraction over generated TXT / DOCX / PDF corpora of increasing size:
+cold extract_text, cache hits, and extract_many against a sequential loop.
+
+    python -m benchmarks.bench_parsers [--sizes small medium large] [--repeat 3] [--files 8]
+"""
+import argparse
+import json
+import time
+from io import BytesIO
+
+from benchmarks.common import isolated_data, timed
+from benchmarks.corpus import MAKERS, SIZES, corpus
+
+
+class _Upload(BytesIO):
+    """Stand-in for Streamlit's UploadedFile: a seekable buffer with a name."""
+
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+
+
+def run(sizes=("small", "medium", "large"), kinds=("txt", "docx", "pdf"), repeat: int = 3, files: int = 8) -> dict:
+    from utils import parsers
+
+    results = {"extract_text": [], "extract_many": []}
+    with isolated_data():
+        for size, name, data in corpus(kinds, sizes):
+            cold = timed(lambda: parsers.extract_bytes(name, data), repeat)
+            parsers.extract_text(_Upload(name, data))
+            warm = timed(lambda: parsers.extract_text(_Upload(name, data)), repeat)
+            results["extract_text"].append({"file": name, "size": size, "bytes": len(data), "parse": cold, "cached": warm})
+
+        for kind in kinds:
+            batch = [(f"cv_{i}.{kind}", MAKERS[kind](SIZES["medium"], seed=100 + i)) for i in range(files)]
+            t0 = time.perf_counter()
+            for name, data in batch:
+                parsers.extract_bytes(name, data)
+            sequential_s = time.perf_counter() - t0
+            parsers.get_extract_cache().clear()
+            t0 = time.perf_counter()
+            parsers.extract_many([_Upload(name, data) for name, data in batch])
+            pooled_s = time.perf_counter() - t0
+            results["extract_many"].append({
+                "kind": kind, "files": files, "sequential_s": sequential_s, "pool_s": pooled_s,
+                "speedup": sequential_s / pooled_s if pooled_s else None,
+            })
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", nargs="+", default=["small", "medium", "large"], choices=list(SIZES))
+    ap.add_argument("--kinds", nargs="+", default=["txt", "docx", "pdf"], choices=list(MAKERS))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--files", type=int, default=8)
+    args = ap.parse_args()
+    params = vars(args)
+    print(json.dumps({"benchmark": "parsers", "params": params, "results": run(**params)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+﻿"""
+Benchmark the feedback store at increasing row counts: single-row vs bulk inserts,
+keyset page fetches, filtered counts, histogram summaries and FTS search.
+
+    python -m benchmarks.bench_persistence [--rows 10000 100000 1000000] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import isolated_data, timed
+from benchmarks.corpus import WORDS
+
+
+def make_rows(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        yield {
+            "requisition": f"REQ-{i % 500:04d}",
+            "candidate": f"Candidate {i % 20000}",
+            "interviewer": f"Interviewer {i % 150}",
+            "rating": rng.randint(1, 5),
+            "comments": " ".join(rng.choice(WORDS) for _ in range(20)),
+            "created_at": (start + timedelta(minutes=i)).isoformat(sep=" "),
+        }
+
+
+def run(rows=(10_000, 100_000), repeat: int = 5, single_inserts: int = 1000) -> dict:
+    from utils import persistence
+
+    results = []
+    for n in rows:
+        with isolated_data():
+            persistence.init_db()
+            t0 = time.perf_counter()
+            for r in make_rows(single_inserts, seed=n + 1):
+                persistence.insert_feedback(r["requisition"], r["candidate"], r["interviewer"], r["rating"], r["comments"])
+            single_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            report = persistence.import_feedback(make_rows(n))
+            bulk_s = time.perf_counter() - t0
+
+            _, cursor = persistence.query_feedback()
+            results.append({
+                "rows": n,
+                "single_insert": {"rows": single_inserts, "total_s": single_s, "rows_per_s": single_inserts / single_s},
+                "bulk_import": {"rows": report["inserted"], "total_s": bulk_s, "rows_per_s": report["inserted"] / bulk_s},
+                "first_page": timed(lambda: persistence.query_feedback(), repeat),
+                "next_page": timed(lambda: persistence.query_feedback(after=cursor), repeat),
+                "filtered_page": timed(lambda: persistence.query_feedback(requisition="REQ-0042", min_rating=4), repeat),
+                "count_filtered": timed(lambda: persistence.count_feedback(interviewer="Interviewer 7"), repeat),
+                "candidate_summary": timed(lambda: persistence.candidate_summary("REQ-0042"), repeat),
+                "candidate_summary_all": timed(persistence.candidate_summary, repeat),
+                "interviewer_summary": timed(persistence.interviewer_summary, repeat),
+                "interviewer_summary_req": timed(lambda: persistence.interviewer_summary("REQ-0042"), repeat),
+                "search": timed(lambda: persistence.search_feedback("stakeholder budget"), repeat),
+            })
+    return {"sizes": results}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--single-inserts", type=int, default=1000)
+    args = ap.parse_args()
+    params = vars(args)
+    print(json.dumps({"benchmark": "persistence", "params": params, "results": run(**params)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+﻿"""
+Startup and rerun timing report for app.py and every page, run headless with Streamlit's AppTest.
+Each script gets a fresh interpreter so its first run includes module imports and cold caches;
+the following reruns show the steady per-interaction overhead.
+
+    python -m benchmarks.bench_startup [--reruns 5] [--pages app.py pages/01_Job_Description_Generator.py]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.common import summarise
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("pandas", "numpy", "openai", "pypdf", "docx")
+
+
+def scripts():
+    return ["app.py"] + sorted(str(p.relative_to(REPO_ROOT)) for p in (REPO_ROOT / "pages").glob("*.py"))
+
+
+def _child(script: str, reruns: int) -> dict:
+    from benchmarks.common import isolated_data
+
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_s = time.perf_counter() - t0
+    with isolated_data():
+        at = AppTest.from_file(str(REPO_ROOT / script), default_timeout=60)
+        t0 = time.perf_counter()
+        at.run()
+        first_s = time.perf_counter() - t0
+        times = []
+        for _ in range(reruns):
+            t0 = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - t0)
+    return {
+        "script": script,
+        "streamlit_import_s": import_s,
+        "first_run_s": first_s,
+        "rerun": summarise(times),
+        "exceptions": [e.value for e in at.exception],
+        "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+
+
+def run(reruns: int = 5, pages=None) -> dict:
+    results = []
+    for script in pages or scripts():
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", script, "--reruns", str(reruns)],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        try:
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        except (IndexError, ValueError):
+            results.append({"script": script, "error": proc.stderr.strip()[-2000:]})
+    return {"scripts": results}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--reruns", type=int, default=5)
+    ap.add_argument("--pages", nargs="+", help="scripts relative to the repo root (default: app.py and pages/*)")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        print(json.dumps(_child(args.child, args.reruns)))
+        return
+    params = {"reruns": args.reruns, "pages": args.pages}
+    print(json.dumps({"benchmark": "startup", "params": params, "results": run(**params)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
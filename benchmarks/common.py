@@ -0,0 +1,82 @@
+﻿"""
+Shared helpers for the offline benchmarks: an isolated data directory and timing summaries.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+@contextmanager
+def isolated_data(base_url: Optional[str] = None) -> Iterator[Path]:
+    """
+    Point every on-disk store (feedback DB, LLM and extract caches, telemetry, jobs, attachments)
+    at a throwaway directory so benchmarks never touch data/. With base_url, the shared
+    OpenAI client is rebuilt against that endpoint with a dummy key.
+    """
+    from utils import attachments, jobs, llm, parsers, persistence, telemetry
+
+    saved_paths = (persistence.DB_PATH, llm.CACHE_PATH, parsers.EXTRACT_CACHE_PATH, telemetry.METRICS_PATH, jobs.JOBS_PATH, attachments.ATTACHMENT_DIR)
+    saved_env = {k: os.environ.get(k) for k in ("OPENAI_API_KEY", "OPENAI_BASE_URL")}
+    with tempfile.TemporaryDirectory(prefix="neogen-bench-") as tmp:
+        root = Path(tmp)
+        persistence.DB_PATH = root / "interview_feedback.db"
+        llm.CACHE_PATH = root / "llm_cache.db"
+        parsers.EXTRACT_CACHE_PATH = root / "extract_cache.db"
+        telemetry.METRICS_PATH = root / "llm_metrics.db"
+        jobs.JOBS_PATH = root / "jobs.db"
+        attachments.ATTACHMENT_DIR = root / "attachments"
+        llm._response_cache = None
+        llm._rate_limiter = None
+        parsers._extract_cache = None
+        if base_url:
+            os.environ["OPENAI_API_KEY"] = "sk-bench"
+            os.environ["OPENAI_BASE_URL"] = base_url
+        llm.reset_client()
+        try:
+            yield root
+        finally:
+            llm.reset_client()
+            if persistence._pool is not None:
+                persistence._pool.close()
+                persistence._pool = None
+            (persistence.DB_PATH, llm.CACHE_PATH, parsers.EXTRACT_CACHE_PATH, telemetry.METRICS_PATH, jobs.JOBS_PATH, attachments.ATTACHMENT_DIR) = saved_paths
+            llm._response_cache = None
+            llm._rate_limiter = None
+            parsers._extract_cache = None
+            for k, v in saved_env.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarise(times: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(times),
+        "mean_s": statistics.fmean(times) if times else 0.0,
+        "p50_s": percentile(times, 0.5),
+        "p95_s": percentile(times, 0.95),
+        "min_s": min(times) if times else 0.0,
+        "max_s": max(times) if times else 0.0,
+    }
+
+
+def timed(fn: Callable, repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return summarise(times)
@@ -0,0 +1,94 @@
+﻿"""
+Synthetic CV / JD corpora for the parser benchmarks: plain text, DOCX and text-layer PDF.
+"""
+import random
+import zlib
+from io import BytesIO
+from typing import List, Tuple
+
+WORDS = (
+    "delivered led managed designed built stakeholder budget team analysis reporting quality compliance "
+    "laboratory customer project agile python excel training recruitment policy payroll process improvement"
+).split()
+
+SIZES = {"small": 40, "medium": 400, "large": 4000}
+
+
+def lines(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        if i % 25 == 0:
+            out.append(rng.choice(["Experience", "Education", "Skills", "Responsibilities", "Requirements"]))
+        else:
+            out.append(" ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + ".")
+    return out
+
+
+def make_txt(n: int, seed: int = 0) -> bytes:
+    return "\n".join(lines(n, seed)).encode("utf-8")
+
+
+def make_docx(n: int, seed: int = 0) -> bytes:
+    from docx import Document
+    doc = Document()
+    for line in lines(n, seed):
+        doc.add_paragraph(line)
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def make_pdf(n: int, seed: int = 0, lines_per_page: int = 50) -> bytes:
+    """A minimal multi-page PDF with a Helvetica text layer, written by hand so no PDF writer is needed."""
+    text = lines(n, seed)
+    pages = [text[i:i + lines_per_page] for i in range(0, len(text), lines_per_page)] or [[]]
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    add(b"")  # catalog, filled in below
+    add(b"")  # page tree
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for page in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in page:
+            esc = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({esc}) Tj T*")
+        ops.append("ET")
+        stream = zlib.compress("\n".join(ops).encode("latin-1"))
+        content = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (font, content)
+        ))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+MAKERS = {"txt": make_txt, "docx": make_docx, "pdf": make_pdf}
+
+
+def corpus(kinds=("txt", "docx", "pdf"), sizes=("small", "medium", "large"), seed: int = 0) -> List[Tuple[str, str, bytes]]:
+    """(size, filename, bytes) for every kind/size combination."""
+    return [
+        (size, f"{size}_{seed}.{kind}", MAKERS[kind](SIZES[size], seed))
+        for size in sizes
+        for kind in kinds
+    ]
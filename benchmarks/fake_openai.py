@@ -0,0 +1,172 @@
+﻿"""
+Minimal OpenAI-compatible chat completions server for offline benchmarks.
+
+    python -m benchmarks.fake_openai --port 8787 --latency 0.2 --token-delay 0.005 --rate-limit-every 10
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8787/v1 and any OPENAI_API_KEY.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class FakeOpenAI:
+    """
+    Serves POST /v1/chat/completions (plain and SSE streaming) from a background thread.
+    latency is the delay before the first token, token_delay the gap between streamed tokens,
+    completion_tokens the reply length, and every rate_limit_every-th request gets a 429
+    with Retry-After: retry_after. Prompt caching is imitated: once a prompt reaches
+    CACHE_MIN_TOKENS, the leading CACHE_BLOCK_TOKENS blocks already seen in earlier prompts
+    are reported as usage.prompt_tokens_details.cached_tokens (4 characters per token).
+    """
+
+    CACHE_MIN_TOKENS = 1024
+    CACHE_BLOCK_TOKENS = 128
+
+    def __init__(self, port: int = 0, latency: float = 0.05, token_delay: float = 0.0, completion_tokens: int = 200,
+                 rate_limit_every: int = 0, retry_after: float = 0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.completion_tokens = completion_tokens
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._seen_prefixes = set()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def cached_tokens(self, messages) -> int:
+        text = "".join(f"{m.get('role')}:{m.get('content') or ''}" for m in messages)
+        if len(text) // 4 < self.CACHE_MIN_TOKENS:
+            return 0
+        block = self.CACHE_BLOCK_TOKENS * 4
+        digest = hashlib.sha256()
+        cached = 0
+        with self._lock:
+            for end in range(block, len(text) + 1, block):
+                digest.update(text[end - block:end].encode("utf-8"))
+                key = digest.hexdigest()
+                if key in self._seen_prefixes and cached == end - block:
+                    cached = end
+                self._seen_prefixes.add(key)
+        return min(cached, len(text)) // 4
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, body: dict, headers: Optional[dict] = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    return self._json(404, {"error": {"message": "not found"}})
+                with fake._lock:
+                    fake.requests += 1
+                    limited = fake.rate_limit_every and fake.requests % fake.rate_limit_every == 0
+                    if limited:
+                        fake.rate_limited += 1
+                if limited:
+                    return self._json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                      {"Retry-After": str(fake.retry_after)})
+
+                n = min(fake.completion_tokens, body.get("max_tokens") or fake.completion_tokens)
+                prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+                usage = {
+                    "prompt_tokens": prompt_tokens, "completion_tokens": n, "total_tokens": prompt_tokens + n,
+                    "prompt_tokens_details": {"cached_tokens": fake.cached_tokens(body.get("messages", []))},
+                }
+                created = int(time.time())
+                time.sleep(fake.latency)
+
+                if not body.get("stream"):
+                    time.sleep(fake.token_delay * n)
+                    return self._json(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": body.get("model"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": "tok " * n}, "finish_reason": "stop"}],
+                        "usage": usage,
+                    })
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def send(obj):
+                    data = f"data: {obj if isinstance(obj, str) else json.dumps(obj)}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": body.get("model")}
+                for i in range(n):
+                    send({**base, "choices": [{"index": 0, "delta": {"content": "tok "}, "finish_reason": None}]})
+                    if fake.token_delay:
+                        time.sleep(fake.token_delay)
+                send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    send({**base, "choices": [], "usage": usage})
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--latency", type=float, default=0.2)
+    ap.add_argument("--token-delay", type=float, default=0.005)
+    ap.add_argument("--completion-tokens", type=int, default=200)
+    ap.add_argument("--rate-limit-every", type=int, default=0)
+    ap.add_argument("--retry-after", type=float, default=0.5)
+    args = ap.parse_args()
+    server = FakeOpenAI(args.port, args.latency, args.token_delay, args.completion_tokens, args.rate_limit_every, args.retry_after)
+    print(f"Fake OpenAI listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
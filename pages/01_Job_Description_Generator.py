@@ -1,8 +1,8 @@
 ﻿import streamlit as st
 from utils.branding import header, sidebar_model_controls, inject_css
-from utils.llm import chat_complete
-from pathlib import Path
-import pandas as pd
+from utils.jobs_ui import submit_chat, job_output
+from utils.prompts import jd_messages
+from utils.assets import house_style, job_levels
 
 st.set_page_config(page_title="Job Description Generator", page_icon="📝", layout="wide")
 inject_css()
@@ -12,12 +12,10 @@ model, temp, max_tokens = sidebar_model_controls()
 
 with st.expander("House Style Source"):
     st.write("Defaulting to **house_style/NEOGEN_HOUSE_STYLE_JD.md**. You can paste or upload your own below.")
-    default_style = Path("house_style/NEOGEN_HOUSE_STYLE_JD.md").read_text(encoding="utf-8")
+    default_style = house_style("NEOGEN_HOUSE_STYLE_JD.md")
     style_override = st.text_area("House Style (Markdown)", value=default_style, height=220)
 
-levels_file = Path("house_style/JOB_LEVELS.csv")
-levels_df = pd.read_csv(levels_file) if levels_file.exists() else pd.DataFrame({"Level":["L1","L2"],"Name":["Associate","Specialist"],"Descriptor":["Entry","IC"]})
-level_display = levels_df.apply(lambda r: f"{r['Level']} - {r['Name']}: {r['Descriptor']}", axis=1).tolist()
+level_display = [f"{r['Level']} - {r['Name']}: {r['Descriptor']}" for r in job_levels()]
 
 with st.form("jd_form"):
     c1, c2, c3 = st.columns(3)
@@ -38,43 +36,12 @@ with st.form("jd_form"):
     comps     = st.text_area("Competencies (bullets, one per line)")
 
     submitted = st.form_submit_button("Generate JD")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
 
-if submitted:
-    system = "You are an HR content generator. Output in clean Markdown following the given House Style and Neogen tone."
+if submitted or regenerate:
     lvl = level_choice.split(" - ")[0] if " - " in level_choice else level_choice
-    user_prompt = f"""
-HOUSE_STYLE:
-{style_override}
+    messages = jd_messages(style_override, job_title, department, location, work_pattern, lvl, travel,
+                           role_purpose, key_resps, req_quals, pref_quals, comps)
+    submit_chat("job_jd", "job_description", model, messages, temp, max_tokens, file_name=f"{job_title or 'job'}_JD.md", use_cache=not regenerate)
 
-INSTRUCTIONS:
-- Create a Job Description in Neogen House Style.
-- Job Title: {job_title}
-- Department/Function: {department}
-- Location: {location}
-- Work Pattern: {work_pattern}
-- Level: {lvl}
-- Travel: {travel}
-
-CONTENT:
-Role Purpose:
-{role_purpose}
-
-Key Responsibilities:
-{key_resps}
-
-Required Qualifications:
-{req_quals}
-
-Preferred Qualifications:
-{pref_quals}
-
-Competencies:
-{comps}
-
-FORMAT: Use clear headings, bullet lists, and concise, inclusive language.
-"""
-    with st.spinner("Generating JD..."):
-        out = chat_complete(model, [{"role":"system","content":system},{"role":"user","content":user_prompt}], temperature=temp, max_tokens=max_tokens)
-    st.markdown("### Output")
-    st.download_button("Download as .md", data=out.encode("utf-8"), file_name=f"{job_title or 'job'}_JD.md", mime="text/markdown")
-    st.markdown(out)
+job_output("job_jd")
@@ -1,8 +1,10 @@
 ﻿import streamlit as st
 from utils.branding import header, sidebar_model_controls, inject_css
-from utils.llm import chat_complete
-from utils.parsers import extract_text
-from pathlib import Path
+from utils.jobs_ui import submit_chat, job_output
+from utils.prompts import ADVERT, advert_messages
+from utils.parsers import UPLOAD_MAX_PAGES, extract_text
+from utils.budget import char_budget, compact, remaining_budget
+from utils.assets import house_style
 
 st.set_page_config(page_title="Job Advert Generator", page_icon="📢", layout="wide")
 inject_css()
@@ -11,7 +13,7 @@ header("Job Advert Generator")
 model, temp, max_tokens = sidebar_model_controls()
 
 with st.expander("House Style Source"):
-    default_style = Path("house_style/NEOGEN_HOUSE_STYLE_ADVERT.md").read_text(encoding="utf-8")
+    default_style = house_style("NEOGEN_HOUSE_STYLE_ADVERT.md")
     style_override = st.text_area("Advert House Style (Markdown)", value=default_style, height=200)
 
 with st.form("ad_form"):
@@ -26,29 +28,13 @@ with st.form("ad_form"):
     jd_file = st.file_uploader("Upload JD (docx/pdf/txt)", type=["docx","pdf","txt"])
     extra_opts = st.text_area("Extra Options (team, tech, travel, reporting line)", "")
     submitted = st.form_submit_button("Generate Advert")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
 
-if submitted:
-    jd_text = extract_text(jd_file) if jd_file else ""
-    system = "You write concise, compelling job adverts in Neogen style."
-    prompt = f"""
-HOUSE_STYLE_ADVERT:
-{style_override}
+if submitted or regenerate:
+    jd_text = extract_text(jd_file, max_pages=UPLOAD_MAX_PAGES, max_chars=char_budget(model, max_tokens)) if jd_file else ""
+    jd_text, budget_report = compact(jd_text, remaining_budget(model, max_tokens, ADVERT.static(style_override), extra_opts), model)
+    if budget_report["trimmed"]:
+        st.caption(budget_report["summary"])
+    submit_chat("job_advert", "job_advert", model, advert_messages(style_override, job_title, location, salary_notes, apply_link, jd_text, extra_opts), temp, max_tokens, file_name=f"{job_title or 'role'}_Advert.md", use_cache=not regenerate)
 
-JOB_TITLE: {job_title}
-LOCATION: {location}
-COMPENSATION: {salary_notes}
-APPLY_LINK: {apply_link}
-
-SOURCE_JD:
-{jd_text}
-
-EXTRA_OPTIONS:
-{extra_opts}
-
-OUTPUT: A polished job advert in Markdown, with strong hook, clear sections, inclusive language, and a bold call-to-action.
-"""
-    with st.spinner("Generating Advert..."):
-        out = chat_complete(model, [{"role":"system","content":system},{"role":"user","content":prompt}], temperature=temp, max_tokens=max_tokens)
-    st.markdown("### Output")
-    st.download_button("Download as .md", data=out.encode("utf-8"), file_name=f"{job_title or 'role'}_Advert.md", mime="text/markdown")
-    st.markdown(out)
+job_output("job_advert")
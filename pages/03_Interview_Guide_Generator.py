@@ -1,7 +1,9 @@
 ﻿import streamlit as st
 from utils.branding import header, sidebar_model_controls, inject_css
-from utils.llm import chat_complete
-from utils.parsers import extract_text
+from utils.jobs_ui import submit_chat, job_output
+from utils.prompts import GUIDE, guide_messages
+from utils.parsers import UPLOAD_MAX_PAGES, extract_text
+from utils.budget import char_budget, compact, remaining_budget
 
 st.set_page_config(page_title="Interview Guide Generator", page_icon="📋", layout="wide")
 inject_css()
@@ -23,34 +25,13 @@ with st.form("ivg_form"):
     custom_notes = st.text_area("Customisation Notes", "Any specific areas to probe or avoid")
 
     submitted = st.form_submit_button("Generate Interview Guide")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
 
-if submitted:
-    jd_text = extract_text(jd_file) if jd_file else ""
-    system = "You produce structured interview guides with sections, suggested timings, and evaluation rubrics."
-    user = f"""
-JOB_TITLE: {job_title}
-SENIORITY: {seniority}
-DURATION: {duration}
+if submitted or regenerate:
+    jd_text = extract_text(jd_file, max_pages=UPLOAD_MAX_PAGES, max_chars=char_budget(model, max_tokens)) if jd_file else ""
+    jd_text, budget_report = compact(jd_text, remaining_budget(model, max_tokens, GUIDE.static(), key_competencies, custom_notes), model)
+    if budget_report["trimmed"]:
+        st.caption(budget_report["summary"])
+    submit_chat("job_guide", "interview_guide", model, guide_messages(job_title, seniority, duration, key_competencies, jd_text, custom_notes), temp, max_tokens, file_name=f"{job_title or 'role'}_Interview_Guide.md", use_cache=not regenerate)
 
-KEY_COMPETENCIES:
-{key_competencies}
-
-JD_CONTEXT (optional):
-{jd_text}
-
-CUSTOM_NOTES:
-{custom_notes}
-
-OUTPUT: A structured guide with:
-- Opening script
-- Section timings
-- Behavioral & technical questions mapped to competencies
-- Score rubric (1–5) and red flags
-- Closing & next steps
-Format in Markdown, concise and practical.
-"""
-    with st.spinner("Generating Guide..."):
-        out = chat_complete(model, [{"role":"system","content":system},{"role":"user","content":user}], temperature=temp, max_tokens=max_tokens)
-    st.markdown("### Output")
-    st.download_button("Download as .md", data=out.encode("utf-8"), file_name=f"{job_title or 'role'}_Interview_Guide.md", mime="text/markdown")
-    st.markdown(out)
+job_output("job_guide")
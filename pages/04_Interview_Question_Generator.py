@@ -1,7 +1,9 @@
 ﻿import streamlit as st
 from utils.branding import header, sidebar_model_controls, inject_css
-from utils.llm import chat_complete
-from utils.parsers import extract_text
+from utils.jobs_ui import submit_chat, job_output
+from utils.prompts import QUESTIONS, questions_messages
+from utils.parsers import UPLOAD_MAX_PAGES, extract_text
+from utils.budget import char_budget, compact, remaining_budget
 
 st.set_page_config(page_title="Interview Question Generator", page_icon="❓", layout="wide")
 inject_css()
@@ -21,30 +23,13 @@ with st.form("ivq_form"):
     custom = st.text_area("Custom Requirements", "Add any domain specifics, systems, methods, or metrics to target.")
 
     submitted = st.form_submit_button("Generate Questions")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
 
-if submitted:
-    jd_text = extract_text(jd_file) if jd_file else ""
-    system = "You write sharp, bias-aware interview questions with sample strong/weak answers and scoring."
-    prompt = f"""
-JOB_TITLE: {job_title}
-SENIORITY: {seniority}
-FOCUS_AREAS: {", ".join(focus)}
+if submitted or regenerate:
+    jd_text = extract_text(jd_file, max_pages=UPLOAD_MAX_PAGES, max_chars=char_budget(model, max_tokens)) if jd_file else ""
+    jd_text, budget_report = compact(jd_text, remaining_budget(model, max_tokens, QUESTIONS.static(), custom), model)
+    if budget_report["trimmed"]:
+        st.caption(budget_report["summary"])
+    submit_chat("job_questions", "interview_questions", model, questions_messages(job_title, seniority, focus, jd_text, custom), temp, max_tokens, file_name=f"{job_title or 'role'}_Interview_Questions.md", use_cache=not regenerate)
 
-JD_CONTEXT:
-{jd_text}
-
-CUSTOM:
-{custom}
-
-OUTPUT: For each focus area, provide:
-- 5 targeted questions
-- What good looks like (bullet points)
-- Pitfalls/red flags
-- Score rubric 1–5
-Format as Markdown with clear headings.
-"""
-    with st.spinner("Generating Questions..."):
-        out = chat_complete(model, [{"role":"system","content":system},{"role":"user","content":prompt}], temperature=temp, max_tokens=max_tokens)
-    st.markdown("### Output")
-    st.download_button("Download as .md", data=out.encode("utf-8"), file_name=f"{job_title or 'role'}_Interview_Questions.md", mime="text/markdown")
-    st.markdown(out)
+job_output("job_questions")
@@ -1,6 +1,7 @@
 ﻿import streamlit as st
 from utils.branding import header, sidebar_model_controls, inject_css
-from utils.llm import chat_complete
+from utils.jobs_ui import submit_chat, job_output
+from utils.prompts import toolkit_messages
 
 st.set_page_config(page_title="Hiring Manager Toolkit", page_icon="🧰", layout="wide")
 inject_css()
@@ -14,25 +15,9 @@ with st.form("hmt_form"):
     stack  = st.text_input("Systems Stack", "Workday, Teams, Calendly, Docusign, Vetting Providers")
     notes  = st.text_area("Notes (team, stages, approvals, offer process)", "")
     submitted = st.form_submit_button("Generate Toolkit (Placeholder content OK)")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
 
-if submitted:
-    system = "You produce pragmatic hiring toolkits: playbook, onboarding checklist, roles & expectations."
-    prompt = f"""
-Create a Hiring Manager Toolkit for: {job_title}
-Region: {region}
-Systems: {stack}
+if submitted or regenerate:
+    submit_chat("job_toolkit", "hm_toolkit", model, toolkit_messages(job_title, region, stack, notes), temp, max_tokens, file_name=f"{job_title or 'role'}_Hiring_Manager_Toolkit.md", use_cache=not regenerate)
 
-Notes:
-{notes}
-
-Deliver:
-1) Hiring Manager Playbook (stages, SLAs, anti-bias guidance, decision criteria)
-2) IT Onboarding Instructions (systems access, hardware, timeline)
-3) Expectations of all parties (HM, TA, Interviewers, Candidate)
-Short, bullet-led, Markdown.
-"""
-    with st.spinner("Generating Toolkit..."):
-        out = chat_complete(model, [{"role":"system","content":system},{"role":"user","content":prompt}], temperature=temp, max_tokens=max_tokens)
-    st.markdown("### Output")
-    st.download_button("Download as .md", data=out.encode("utf-8"), file_name=f"{job_title or 'role'}_Hiring_Manager_Toolkit.md", mime="text/markdown")
-    st.markdown(out)
+job_output("job_toolkit")
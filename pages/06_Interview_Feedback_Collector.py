@@ -1,9 +1,15 @@
 ﻿import streamlit as st
 from utils.branding import header, inject_css
-from utils.persistence import init_db, insert_feedback, fetch_all
-from pathlib import Path
+from utils.persistence import (
+    init_db, insert_feedback, query_feedback, export_feedback, count_feedback, FEEDBACK_COLUMNS, PAGE_SIZE, SUMMARY_LIMIT,
+    candidate_summary, requisition_summary, interviewer_summary, search_feedback,
+    import_feedback, read_import_file, list_attachments, attachment_counts, HIGHLIGHT_START, HIGHLIGHT_END,
+)
+from utils.attachments import store_blob, open_blob
 import pandas as pd
 import base64
+import io
+import re
 
 st.set_page_config(page_title="Interview Feedback Collector", page_icon="🗒️", layout="wide")
 inject_css()
@@ -29,23 +35,122 @@ with st.form("feedback_form"):
     submitted = st.form_submit_button("Submit Feedback")
 
 if submitted:
-    attach_names = []
-    if files:
-        Path("data").mkdir(parents=True, exist_ok=True)
-        for f in files:
-            path = Path("data")/f.name
-            with open(path, "wb") as out:
-                out.write(f.read())
-            attach_names.append(str(path))
-    row_id = insert_feedback(req, candidate, interviewer, rating, comments, "; ".join(attach_names))
+    blobs = [store_blob(f) for f in files or []]
+    row_id = insert_feedback(req, candidate, interviewer, rating, comments, blobs=blobs)
     st.success(f"Saved entry #{row_id}")
 
+with st.expander("Bulk import (CSV / JSONL)"):
+    st.write("Columns: requisition, candidate, interviewer, rating (1-5), and optionally comments, attachments, created_at (YYYY-MM-DD HH:MM:SS) and id (from the source system). Rows with a created_at or id that were already imported are skipped; rows with neither are always added.")
+    import_file = st.file_uploader("Feedback file", type=["csv", "jsonl"], key="import_file")
+    if import_file and st.button("Import"):
+        fmt = "jsonl" if import_file.name.lower().endswith(".jsonl") else "csv"
+        with st.spinner("Importing..."):
+            result = import_feedback(read_import_file(import_file, fmt))
+        st.success(f"Imported {result['inserted']:,} rows; skipped {result['duplicates']:,} duplicates.")
+        if result["errors"]:
+            st.warning(f"{len(result['errors']):,} rows rejected" + (" (showing the first 1,000)" if len(result["errors"]) >= 1000 else ""))
+            st.dataframe(pd.DataFrame(result["errors"], columns=["line", "error"]), use_container_width=True, hide_index=True)
+
 st.markdown("### Feedback Log")
-rows = fetch_all()
+with st.expander("Filters", expanded=False):
+    f1, f2, f3 = st.columns(3)
+    with f1:
+        f_req = st.text_input("Requisition #", key="f_req")
+    with f2:
+        f_cand = st.text_input("Candidate", key="f_cand")
+    with f3:
+        f_int = st.text_input("Interviewer", key="f_int")
+    f4, f5 = st.columns(2)
+    with f4:
+        f_dates = st.date_input("Date range", value=(), key="f_dates")
+    with f5:
+        f_rating = st.slider("Rating", 1, 5, (1, 5), key="f_rating")
+
+filters = dict(
+    requisition=f_req or None,
+    candidate=f_cand or None,
+    interviewer=f_int or None,
+    date_from=f_dates[0] if len(f_dates) > 0 else None,
+    date_to=f_dates[1] if len(f_dates) > 1 else None,
+    min_rating=f_rating[0] if f_rating[0] > 1 else None,
+    max_rating=f_rating[1] if f_rating[1] < 5 else None,
+)
+
+def md_escape(text) -> str:
+    # User text goes inline into Markdown: one line, with Markdown syntax characters escaped
+    return re.sub(r"([\\`*_{}\[\]()#+\-.!|>~<$])", r"\\\1", " ".join(str(text).split()))
+
+
+search = st.text_input("Search comments", placeholder='e.g. stakeholder management', key="f_search")
+if search.strip():
+    hits = search_feedback(search, **filters)
+    st.caption(f"{len(hits)} best matches" if hits else "No comments match.")
+    for hit_id, h_req, h_cand, h_int, h_rating, h_created, snippet in hits:
+        snippet = md_escape(snippet).replace(HIGHLIGHT_START, "**").replace(HIGHLIGHT_END, "**")
+        st.markdown(f"**#{hit_id}** · {md_escape(h_req)} · {md_escape(h_cand)} · {md_escape(h_int)} · rating {h_rating} · {h_created}  \n> {snippet}")
+
+# Keyset pagination: remember the cursor that starts each page we have visited
+if st.session_state.get("log_filters") != filters:
+    st.session_state["log_filters"] = filters
+    st.session_state["log_cursors"] = [None]
+cursors = st.session_state["log_cursors"]
+
+rows, next_cursor = query_feedback(after=cursors[-1], **filters)
 if rows:
-    df = pd.DataFrame(rows, columns=["id","requisition","candidate","interviewer","rating","comments","attachments","created_at"])
+    total = count_feedback(**filters)
+    page_no = len(cursors)
+    st.caption(f"{total:,} matching entries - page {page_no} of {max(1, -(-total // PAGE_SIZE))}")
+    df = pd.DataFrame(rows, columns=FEEDBACK_COLUMNS)
+    counts = attachment_counts([r[0] for r in rows])
+    df["files"] = [counts.get(r[0], 0) for r in rows]
     st.dataframe(df, use_container_width=True)
-    csv = df.to_csv(index=False).encode("utf-8")
-    st.download_button("Export CSV", data=csv, file_name="interview_feedback.csv", mime="text/csv")
+
+    with_files = [r[0] for r in rows if counts.get(r[0])]
+    if with_files:
+        entry = st.selectbox("Attachments for entry #", with_files)
+        for att_id, sha, fname, size, mime, _ in list_attachments(entry):
+            # Only the selected entry's files are read from the store
+            with open_blob(sha) as blob:
+                st.download_button(f"{fname} ({size / 1024:,.0f} KB)", data=blob.read(), file_name=fname, mime=mime, key=f"att_{att_id}")
+
+    p1, p2, _ = st.columns([1, 1, 6])
+    with p1:
+        if st.button("Previous", disabled=page_no == 1):
+            cursors.pop()
+            st.rerun()
+    with p2:
+        if st.button("Next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    e1, e2 = st.columns([1, 3])
+    with e1:
+        export_fmt = st.radio("Export format", ["csv", "jsonl"], horizontal=True)
+    with e2:
+        if st.button("Prepare export"):
+            # Rows stream from SQLite in chunks, but st.download_button keeps its data in memory,
+            # so the encoded file is held once (no row lists or DataFrame alongside it)
+            export_buf = io.BytesIO()
+            export_feedback(export_buf, export_fmt, **filters)
+            mime = "text/csv" if export_fmt == "csv" else "application/x-ndjson"
+            st.download_button(f"Export {export_fmt.upper()}", data=export_buf.getvalue(), file_name=f"interview_feedback.{export_fmt}", mime=mime)
+else:
+    st.write("No records yet." if not any(v is not None for v in filters.values()) else "No matching records.")
+
+st.markdown("### Debrief Summary")
+# Only the selected view is computed on each rerun
+view = st.radio("Summary", ["By candidate", "By requisition", "By interviewer"], horizontal=True, label_visibility="collapsed")
+if view == "By candidate":
+    summary = candidate_summary(filters["requisition"])
+    if len(summary) == SUMMARY_LIMIT:
+        st.caption(f"Top {SUMMARY_LIMIT} candidates by mean rating; filter by requisition to see the rest.")
+elif view == "By requisition":
+    summary = requisition_summary()
+else:
+    summary = interviewer_summary(filters["requisition"])
+    if summary:
+        st.caption("Leniency: average difference from the panel's mean rating for the same candidate (positive = more generous). Spread: how consistent that difference is.")
+if summary:
+    st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
 else:
-    st.write("No records yet.")
+    st.write("No ratings yet.")
@@ -1,7 +1,7 @@
 ﻿import streamlit as st
 from utils.branding import header, sidebar_model_controls, inject_css
-from utils.llm import chat_complete
-from utils.parsers import extract_text
+from utils.jobs_ui import submit, job_output
+from utils.shortlist import DEFAULT_TOP_K, run_shortlist
 
 st.set_page_config(page_title="Shortlisting Summary Tool", page_icon="🧮", layout="wide")
 inject_css()
@@ -9,55 +9,43 @@ header("Shortlisting Summary Tool")
 
 model, temp, max_tokens = sidebar_model_controls()
 
-st.write("Upload up to five CVs and a JD to produce an executive summary and comparison.")
+st.write("Upload a JD and any number of CVs. CVs are first ranked locally by keyword match with the JD; the best matches are summarised against the JD in parallel, then compared in an executive shortlist.")
 
 with st.form("shortlist_form"):
     jd = st.file_uploader("Job Description (docx/pdf/txt)*", type=["docx","pdf","txt"])
-    c1, c2 = st.columns(2)
-    with c1:
-        cv1 = st.file_uploader("CV #1", type=["docx","pdf","txt"])
-        cv2 = st.file_uploader("CV #2", type=["docx","pdf","txt"])
-        cv3 = st.file_uploader("CV #3", type=["docx","pdf","txt"])
-    with c2:
-        cv4 = st.file_uploader("CV #4", type=["docx","pdf","txt"])
-        cv5 = st.file_uploader("CV #5", type=["docx","pdf","txt"])
+    cv_files = st.file_uploader("CVs (docx/pdf/txt, select multiple)*", type=["docx","pdf","txt"], accept_multiple_files=True)
 
     extra = st.text_area("Focus Areas (optional)", "Industry experience; Years in role; Key technologies; Leadership; Regulatory; Travel; Salary fit")
+    top_k = st.number_input("CVs to assess with the model (best keyword matches first; 0 = all)", min_value=0, value=DEFAULT_TOP_K, step=5)
     submitted = st.form_submit_button("Generate Summary")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
 
-if submitted:
+if submitted or regenerate:
     if not jd:
         st.error("Please upload a JD.")
         st.stop()
-
-    jd_text = extract_text(jd)
-    cvs = [cv1, cv2, cv3, cv4, cv5]
-    cv_texts = [extract_text(f) for f in cvs if f is not None]
-
-    if not cv_texts:
+    if not cv_files:
         st.error("Please upload at least one CV.")
         st.stop()
-
-    system = "You are an expert TA partner generating concise, decision-ready shortlists."
-    prompt = f"""
-JOB_DESCRIPTION:
-{jd_text}
-
-CANDIDATE_CVS:
-{"\n\n---\n\n".join(cv_texts)}
-
-FOCUS_AREAS:
-{extra}
-
-OUTPUT:
-1) Executive Summary (5-8 bullet points)
-2) Comparison Table (CSV-friendly): Candidate, Strengths, Risks/Gaps, Years Experience, Key Skills, Notable Companies, Salary/Level Fit (guess), Overall Rating (1-5)
-3) Recommendation: Who to proceed with and why
-Tone: crisp, neutral, evidence-based. Keep table compact.
-"""
-    with st.spinner("Analysing candidates vs role..."):
-        out = chat_complete(model, [{"role":"system","content":system},{"role":"user","content":prompt}], temperature=temp, max_tokens=max_tokens)
-
-    st.markdown("### Output")
-    st.download_button("Download as .md", data=out.encode("utf-8"), file_name="Shortlist_Summary.md", mime="text/markdown")
-    st.markdown(out)
+    # Uploads do not outlive this run, so hand the job plain bytes
+    submit("job_shortlist", "shortlist", run_shortlist, model, (jd.name, jd.getvalue()), [(f.name, f.getvalue()) for f in cv_files],
+           extra, temperature=temp, max_tokens=max_tokens, top_k=int(top_k), use_cache=not regenerate, file_name="Shortlist_Summary.md")
+
+
+def show_details(meta):
+    if meta.get("unreadable"):
+        st.warning("Could not read: " + ", ".join(meta["unreadable"]))
+    if meta.get("scores"):
+        sent = sum(1 for _, _, kept in meta["scores"] if kept)
+        with st.expander(f"JD match scores ({sent} of {len(meta['scores'])} CVs sent to the model)"):
+            st.dataframe([{"Candidate": name, "Match score": score, "Assessed": kept} for name, score, kept in meta["scores"]],
+                         use_container_width=True, hide_index=True)
+    if meta.get("budget_notes"):
+        with st.expander(f"Inputs compacted to fit the model ({len(meta['budget_notes'])})"):
+            st.markdown("\n".join(f"- {n}" for n in meta["budget_notes"]))
+    if meta.get("cards"):
+        with st.expander(f"Candidate summaries ({len(meta['cards'])})"):
+            st.markdown("\n\n---\n\n".join(meta["cards"]))
+
+
+job_output("job_shortlist", render_meta=show_details)
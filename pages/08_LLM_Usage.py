@@ -0,0 +1,36 @@
+﻿import streamlit as st
+from utils.branding import header, inject_css
+from utils.telemetry import summary, recent_calls
+from utils.llm import cache_stats
+import pandas as pd
+
+st.set_page_config(page_title="LLM Usage", page_icon="📈", layout="wide")
+inject_css()
+header("LLM Usage", kicker="Admin")
+
+days = st.sidebar.slider("Window (days)", 1, 90, 30)
+
+stats = cache_stats()
+c1, c2, c3 = st.columns(3)
+c1.metric("Response cache entries", f"{stats['entries']:,}")
+c2.metric("Cache size", f"{stats['bytes'] / 1e6:,.1f} MB")
+c3.metric("Hits / misses (this process)", f"{stats['hits']:,} / {stats['misses']:,}")
+
+st.markdown("### Latency and tokens per tool")
+rows = summary(days)
+if rows:
+    df = pd.DataFrame(rows)
+    if df["cost_usd"].notna().any():
+        st.metric("Estimated cost", f"${df['cost_usd'].sum():,.2f}")
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.caption("Cost uses the per-model list prices in utils/telemetry.py (override with NEOGEN_LLM_PRICES); blank for unpriced models.")
+    st.markdown("#### Tokens per tool")
+    st.bar_chart(df.groupby("page")[["prompt_tokens", "completion_tokens"]].sum())
+else:
+    st.write("No LLM calls recorded yet.")
+
+st.markdown("### Recent calls")
+recent = recent_calls()
+if recent:
+    st.dataframe(pd.DataFrame(recent, columns=["time (UTC)", "page", "model", "kind", "outcome", "latency_s", "ttft_s", "prompt_tokens", "cached_tokens", "completion_tokens", "attempts"]),
+                 use_container_width=True, hide_index=True)
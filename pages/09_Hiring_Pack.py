@@ -0,0 +1,69 @@
+﻿import streamlit as st
+from utils.branding import header, sidebar_model_controls, inject_css
+from utils.jobs_ui import submit, job_output
+from utils.hiring_pack import PACK_DEFAULTS, run_hiring_pack, bundle
+from utils.assets import house_style
+
+st.set_page_config(page_title="Hiring Pack", page_icon="📦", layout="wide")
+inject_css()
+header("Hiring Pack")
+
+model, temp, max_tokens = sidebar_model_controls()
+
+st.write("Upload a JD once to generate the job advert, interview guide, interview questions and hiring manager toolkit together.")
+
+with st.form("pack_form"):
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        job_title = st.text_input("Job Title*", "")
+    with c2:
+        location = st.text_input("Location*", PACK_DEFAULTS["location"])
+    with c3:
+        seniority = st.selectbox("Seniority", ["Associate","Specialist","Senior","Manager","Sr Manager","Director","VP"], index=2)
+    jd_file = st.file_uploader("Upload JD (docx/pdf/txt)*", type=["docx","pdf","txt"])
+
+    with st.expander("Advert options"):
+        salary_notes = st.text_input("Compensation Notes", PACK_DEFAULTS["salary_notes"])
+        apply_link = st.text_input("Apply Link / CTA", PACK_DEFAULTS["apply_link"])
+        extra_opts = st.text_area("Extra Options (team, tech, travel, reporting line)", "")
+    with st.expander("Interview options"):
+        duration = st.selectbox("Interview Length", ["30 mins","45 mins","60 mins","90 mins"], index=2)
+        key_competencies = st.text_area("Key Competencies (one per line)", PACK_DEFAULTS["key_competencies"])
+        focus = st.multiselect("Question Focus Areas", ["Behavioral","Technical","Leadership","Culture & Values","Scenario/Case"], default=PACK_DEFAULTS["focus"])
+        # Same fields as pages 03 and 04: guide notes and question requirements are separate prompts
+        custom_notes = st.text_area("Guide Customisation Notes", PACK_DEFAULTS["custom_notes"], placeholder="Any specific areas to probe or avoid")
+        custom = st.text_area("Question Custom Requirements", PACK_DEFAULTS["custom"], placeholder="Domain specifics, systems, methods, or metrics to target")
+    with st.expander("Toolkit options"):
+        region = st.text_input("Region", PACK_DEFAULTS["region"])
+        stack = st.text_input("Systems Stack", PACK_DEFAULTS["stack"])
+        notes = st.text_area("Notes (team, stages, approvals, offer process)", "")
+
+    submitted = st.form_submit_button("Generate Hiring Pack")
+    regenerate = st.form_submit_button("Regenerate (skip cache)")
+
+if submitted or regenerate:
+    if not jd_file:
+        st.error("Please upload a JD.")
+        st.stop()
+    opts = {
+        "job_title": job_title, "location": location, "seniority": seniority,
+        "style": house_style("NEOGEN_HOUSE_STYLE_ADVERT.md"),
+        "salary_notes": salary_notes, "apply_link": apply_link, "extra_opts": extra_opts,
+        "duration": duration, "key_competencies": key_competencies, "custom_notes": custom_notes,
+        "focus": focus, "custom": custom,
+        "region": region, "stack": stack, "notes": notes,
+    }
+    submit("job_pack", "hiring_pack", run_hiring_pack, model, (jd_file.name, jd_file.getvalue()), opts,
+           temperature=temp, max_tokens=max_tokens, use_cache=not regenerate, file_name=f"{job_title or 'role'}_Hiring_Pack.md")
+
+
+def show_pack(meta):
+    if meta.get("budget_summary"):
+        st.caption(meta["budget_summary"])
+    if meta.get("failed"):
+        st.warning("Could not generate: " + ", ".join(meta["failed"]))
+    if meta.get("files"):
+        st.download_button("Download pack (.zip)", data=bundle(meta["files"]), file_name=meta["zip_name"], mime="application/zip")
+
+
+job_output("job_pack", render_meta=show_pack)
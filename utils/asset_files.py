@@ -0,0 +1,46 @@
+﻿import csv
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+HOUSE_STYLE_DIR = REPO_ROOT / "house_style"
+JOB_LEVELS_CSV = "house_style/JOB_LEVELS.csv"
+
+DEFAULT_LEVELS = [
+    {"Level": "L1", "Name": "Associate", "Descriptor": "Entry"},
+    {"Level": "L2", "Name": "Specialist", "Descriptor": "IC"},
+]
+
+def read_asset(relpath: str) -> Optional[str]:
+    """Text of a file under the repo root, or None when it is missing. Uncached; see utils.assets for the pages."""
+    try:
+        return (REPO_ROOT / relpath).read_text(encoding="utf-8-sig")
+    except FileNotFoundError:
+        return None
+
+def read_house_style(name: str) -> str:
+    """Markdown from house_style/, e.g. read_house_style("NEOGEN_HOUSE_STYLE_JD.md"); "" if missing."""
+    return read_asset(f"house_style/{name}") or ""
+
+def parse_levels(text: str) -> List[Dict[str, str]]:
+    return [dict(row) for row in csv.DictReader(text.splitlines())]
+
+def read_job_levels() -> List[Dict[str, str]]:
+    """Rows of house_style/JOB_LEVELS.csv (Level, Name, Descriptor), or a two-level default."""
+    text = read_asset(JOB_LEVELS_CSV)
+    if not text:
+        return DEFAULT_LEVELS
+    return parse_levels(text)
+
+def resolve_level(value: str, levels: Optional[List[Dict[str, str]]] = None) -> str:
+    """
+    Map a level given as its code ("L3"), name ("Senior") or page-01 label ("L3 - Senior: ...")
+    to the JOB_LEVELS.csv code. Raises ValueError for anything not in the table.
+    Pass `levels` to avoid re-reading the CSV for every value.
+    """
+    levels = read_job_levels() if levels is None else levels
+    key = value.split(" - ")[0].strip().lower()
+    for row in levels:
+        if key in (row["Level"].strip().lower(), row["Name"].strip().lower()):
+            return row["Level"]
+    raise ValueError(f"unknown level '{value}' (expected one of {', '.join(r['Level'] for r in levels)})")
@@ -0,0 +1,38 @@
+﻿from typing import Dict, List, Optional
+
+import streamlit as st
+
+from utils.asset_files import REPO_ROOT, JOB_LEVELS_CSV, read_asset, read_house_style, read_job_levels
+
+# Cached front ends to utils.asset_files for the pages. Each wrapper takes the file's mtime as
+# part of the cache key, so an edited file is picked up without a restart at the cost of a stat().
+
+def _mtime(relpath: str) -> Optional[int]:
+    try:
+        return (REPO_ROOT / relpath).stat().st_mtime_ns
+    except OSError:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def _asset_text(relpath: str, mtime: Optional[int]) -> Optional[str]:
+    return read_asset(relpath) if mtime is not None else None
+
+@st.cache_resource(show_spinner=False)
+def _house_style(name: str, mtime: Optional[int]) -> str:
+    return read_house_style(name)
+
+@st.cache_resource(show_spinner=False)
+def _job_levels(mtime: Optional[int]) -> List[Dict[str, str]]:
+    return read_job_levels()
+
+def asset_text(relpath: str) -> Optional[str]:
+    """Cached read_asset: text of a file under the repo root, or None when it is missing."""
+    return _asset_text(relpath, _mtime(relpath))
+
+def house_style(name: str) -> str:
+    """Cached read_house_style."""
+    return _house_style(name, _mtime(f"house_style/{name}"))
+
+def job_levels() -> List[Dict[str, str]]:
+    """Cached read_job_levels."""
+    return _job_levels(_mtime(JOB_LEVELS_CSV))
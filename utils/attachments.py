@@ -0,0 +1,49 @@
+﻿import hashlib
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+ATTACHMENT_DIR = Path("data/attachments")
+CHUNK_BYTES = 1024 * 1024
+
+
+def blob_path(sha256: str) -> Path:
+    # Fan out by hash prefix so no single directory grows unbounded
+    return ATTACHMENT_DIR / sha256[:2] / sha256
+
+
+def store_blob(f: BinaryIO, filename: Optional[str] = None) -> Tuple[str, str, int, Optional[str]]:
+    """
+    Copy an uploaded file into the content-addressed store in fixed-size chunks, hashing as it
+    goes. Identical content is stored once. Returns (sha256, filename, size, mime), ready for
+    persistence.insert_feedback(blobs=...).
+    """
+    filename = Path(filename or getattr(f, "name", "attachment")).name
+    ATTACHMENT_DIR.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=ATTACHMENT_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = h.hexdigest()
+        dest = blob_path(digest)
+        if dest.exists():
+            os.remove(tmp)
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return digest, filename, size, mimetypes.guess_type(filename)[0]
+
+
+def open_blob(sha256: str) -> BinaryIO:
+    return open(blob_path(sha256), "rb")
@@ -0,0 +1,213 @@
+﻿"""
+Generate JDs (and optionally adverts) for every role in a CSV, without the UI.
+
+    python -m utils.batch roles.csv --out generated/ [--kinds jd advert] [--model gpt-4o-mini] [--workers 8]
+
+CSV headers (case-insensitive): title (required), department, level (code, name or
+label from house_style/JOB_LEVELS.csv), location, work_pattern, travel, role_purpose,
+responsibilities, required_qualifications, preferred_qualifications, competencies,
+salary_notes, apply_link, extra_options. Finished files are recorded in a checkpoint
+in the output directory, so an interrupted run picks up where it stopped.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import telemetry
+from utils.asset_files import read_house_style, read_job_levels, resolve_level
+from utils.budget import compact, remaining_budget
+from utils.llm import BATCH_MAX_WORKERS, chat_complete_many
+from utils.prompts import ADVERT, advert_messages, jd_messages
+
+CHECKPOINT_NAME = "_checkpoint.jsonl"
+
+# Page 01/02 form defaults for optional columns
+ROLE_DEFAULTS = {
+    "department": "",
+    "level": "",
+    "location": "Remote/Hybrid/Onsite",
+    "work_pattern": "Full-time",
+    "travel": "Occasional",
+    "role_purpose": "",
+    "responsibilities": "",
+    "required_qualifications": "",
+    "preferred_qualifications": "",
+    "competencies": "",
+    "salary_notes": "Competitive + benefits",
+    "apply_link": "https://careers.neogen.com",
+    "extra_options": "",
+}
+SUFFIXES = {"jd": "JD", "advert": "Advert"}
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")[:60] or "role"
+
+
+def read_roles(path: Path) -> Tuple[List[Dict[str, str]], List[Tuple[int, str]]]:
+    """Roles from the CSV with defaults filled, levels resolved and a unique file stem each; plus (row, error) pairs."""
+    roles, errors, seen = [], [], {}
+    levels = read_job_levels()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for n, raw in enumerate(csv.DictReader(f), start=1):
+            row = {str(k).strip().lower(): (v or "").strip() for k, v in raw.items() if k is not None}
+            role = {**ROLE_DEFAULTS, **{k: v for k, v in row.items() if v}}
+            role["title"] = row.get("title") or row.get("job_title") or ""
+            if not role["title"]:
+                errors.append((n, "missing title"))
+                continue
+            try:
+                role["level"] = resolve_level(role["level"], levels) if role["level"] else ""
+            except ValueError as e:
+                errors.append((n, str(e)))
+                continue
+            stem = "_".join(filter(None, [_slug(role["title"]), role["level"]]))
+            seen[stem] = seen.get(stem, 0) + 1
+            role["stem"] = stem if seen[stem] == 1 else f"{stem}_{seen[stem]}"
+            roles.append(role)
+    return roles, errors
+
+
+def _request_id(kind: str, req: Dict[str, Any]) -> str:
+    payload = json.dumps({"kind": kind, **req}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Append-only record of finished outputs: request id -> file written for it."""
+
+    def __init__(self, out_dir: Path):
+        self.path = out_dir / CHECKPOINT_NAME
+        self.done: Dict[str, str] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    self.done[entry["id"]] = entry["file"]
+
+    def finished(self, request_id: str, out_dir: Path) -> bool:
+        name = self.done.get(request_id)
+        return name is not None and (out_dir / name).exists()
+
+    def add(self, request_id: str, file_name: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": request_id, "file": file_name}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done[request_id] = file_name
+
+
+def _write(path: Path, text: str) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _run_wave(kind: str, items: List[Tuple[Dict[str, str], Dict[str, Any]]], out_dir: Path, checkpoint: Checkpoint,
+              workers: int, force: bool) -> Dict[str, int]:
+    """Generate one file per (role, request) not already checkpointed; each is saved as soon as it finishes."""
+    todo = []
+    for role, req in items:
+        rid = _request_id(kind, req)
+        if force or not checkpoint.finished(rid, out_dir):
+            todo.append((role, req, rid))
+    stats = {"skipped": len(items) - len(todo), "written": 0, "failed": 0}
+
+    def on_result(i: int, result: Dict[str, Any]) -> None:
+        role, _, rid = todo[i]
+        if result["error"] is not None:
+            stats["failed"] += 1
+            print(f"[{kind}] {role['stem']}: {result['text']}", file=sys.stderr)
+            return
+        name = f"{role['stem']}_{SUFFIXES[kind]}.md"
+        _write(out_dir / name, result["text"])
+        checkpoint.add(rid, name)
+        stats["written"] += 1
+
+    def on_progress(done: int, total: int) -> None:
+        print(f"[{kind}] {done}/{total}", file=sys.stderr)
+
+    chat_complete_many([req for _, req, _ in todo], max_workers=workers, use_cache=not force, on_result=on_result, on_progress=on_progress)
+    return stats
+
+
+def run(csv_path: Path, out_dir: Path, kinds: List[str], model: str, temperature: float, max_tokens: int,
+        workers: int = BATCH_MAX_WORKERS, jd_style: Optional[str] = None, advert_style: Optional[str] = None,
+        force: bool = False) -> Dict[str, Any]:
+    telemetry.set_page("Batch CLI")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    roles, errors = read_roles(csv_path)
+    for n, err in errors:
+        print(f"row {n}: {err}", file=sys.stderr)
+    jd_style = read_house_style("NEOGEN_HOUSE_STYLE_JD.md") if jd_style is None else jd_style
+    advert_style = read_house_style("NEOGEN_HOUSE_STYLE_ADVERT.md") if advert_style is None else advert_style
+    checkpoint = Checkpoint(out_dir)
+    summary: Dict[str, Any] = {"roles": len(roles), "invalid_rows": len(errors)}
+
+    def request(messages):
+        return {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+
+    if "jd" in kinds:
+        items = [
+            (r, request(jd_messages(jd_style, r["title"], r["department"], r["location"], r["work_pattern"], r["level"], r["travel"],
+                                    r["role_purpose"], r["responsibilities"], r["required_qualifications"],
+                                    r["preferred_qualifications"], r["competencies"])))
+            for r in roles
+        ]
+        summary["jd"] = _run_wave("jd", items, out_dir, checkpoint, workers, force)
+
+    if "advert" in kinds:
+        # Adverts are written from each role's generated JD, as page 02 does from an uploaded one
+        items = []
+        missing_jd = 0
+        for r in roles:
+            jd_path = out_dir / f"{r['stem']}_{SUFFIXES['jd']}.md"
+            if not jd_path.exists():
+                # No JD to write from (its generation failed or was never run); an advert from "" is not one to checkpoint
+                missing_jd += 1
+                print(f"[advert] {r['stem']}: no JD at {jd_path}", file=sys.stderr)
+                continue
+            jd_text, _ = compact(jd_path.read_text(encoding="utf-8"), remaining_budget(model, max_tokens, ADVERT.static(advert_style), r["extra_options"]), model)
+            items.append((r, request(advert_messages(advert_style, r["title"], r["location"], r["salary_notes"], r["apply_link"],
+                                                     jd_text, r["extra_options"]))))
+        summary["advert"] = _run_wave("advert", items, out_dir, checkpoint, workers, force)
+        summary["advert"]["failed"] += missing_jd
+    return summary
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("csv", type=Path, help="CSV of roles, one per row")
+    ap.add_argument("--out", type=Path, default=Path("generated"), help="directory for the Markdown files and checkpoint")
+    ap.add_argument("--kinds", nargs="+", default=["jd"], choices=list(SUFFIXES))
+    ap.add_argument("--model", default="gpt-4o-mini")
+    ap.add_argument("--temperature", type=float, default=0.2)
+    ap.add_argument("--max-tokens", type=int, default=1800)
+    ap.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS)
+    ap.add_argument("--jd-style", type=Path, help="house style Markdown for JDs (default: house_style/NEOGEN_HOUSE_STYLE_JD.md)")
+    ap.add_argument("--advert-style", type=Path, help="house style Markdown for adverts")
+    ap.add_argument("--force", action="store_true", help="regenerate even if the checkpoint has the output")
+    args = ap.parse_args()
+
+    summary = run(
+        args.csv, args.out, args.kinds, args.model, args.temperature, args.max_tokens, workers=args.workers,
+        jd_style=args.jd_style.read_text(encoding="utf-8-sig") if args.jd_style else None,
+        advert_style=args.advert_style.read_text(encoding="utf-8-sig") if args.advert_style else None,
+        force=args.force,
+    )
+    print(json.dumps(summary, indent=2))
+    failed = sum(summary.get(k, {}).get("failed", 0) for k in SUFFIXES)
+    sys.exit(1 if failed or summary["invalid_rows"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 ﻿import streamlit as st
 from pathlib import Path
 from urllib.parse import quote
+from utils import telemetry
+from utils.assets import asset_text
 
+@st.cache_resource(show_spinner=False)
 def _find_logo_file() -> Path | None:
     """
     Look for a logo in /assets relative to BOTH:
       - the repo root (utils/..)
       - the current working directory (Streamlit runtime)
     Prefer raster (PNG/JPG/WebP/GIF), then SVG.
+    Cached for the life of the process; restart the app after adding a logo.
     """
     # repo root = utils/.. (this file is utils/branding.py)
     repo_root = Path(__file__).resolve().parents[1]
@@ -33,12 +37,15 @@ def _find_logo_file() -> Path | None:
 
     return None
 
+@st.cache_resource(show_spinner=False)
 def _svg_html(p: Path, width_px: int) -> str:
     data = p.read_text(encoding="utf-8")
     uri = "data:image/svg+xml;utf8," + quote(data)
     return f'<img src="{uri}" alt="Neogen" style="width:{width_px}px; display:block;" />'
 
 def header(title: str, kicker: str = "Neogen HR Suite", logo_width: int = 140):
+    # Every page calls header() first, so it doubles as the page tag for LLM telemetry
+    telemetry.set_page(title)
     # Layout: small logo column + kicker, then title/caption
     c1, c2 = st.columns([1, 9], gap="small")
     logo_path = _find_logo_file()
@@ -74,7 +81,8 @@ def sidebar_model_controls():
 
 def inject_css():
     try:
-        css = (Path(__file__).resolve().parents[1] / "assets" / "styles.css").read_text(encoding="utf-8")
-        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+        css = asset_text("assets/styles.css")
+        if css:
+            st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
     except Exception:
         pass
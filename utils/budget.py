@@ -0,0 +1,234 @@
+﻿import os
+import re
+from functools import lru_cache
+from typing import List, Dict, Tuple, Any
+
+CONTEXT_WINDOWS = {
+    "gpt-4o-mini": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4.1": 1_047_576,
+    "gpt-3.5-turbo": 16_385,
+}
+DEFAULT_CONTEXT_WINDOW = 16_385
+
+# Hard ceiling on prompt size regardless of context window: beyond this, latency and cost
+# grow faster than answer quality
+INPUT_TOKEN_CAP = int(os.getenv("NEOGEN_INPUT_TOKEN_CAP", 16_000))
+SAFETY_MARGIN_TOKENS = 256
+# Rough token size used when tiktoken is unavailable and for sizing extraction caps
+CHARS_PER_TOKEN = 4
+# utils.parsers separates PDF pages with a form feed; headers, footers and page numbers are
+# only looked for within EDGE_LINES non-blank lines of a page break
+PAGE_BREAK = "\f"
+EDGE_LINES = 2
+MIN_HEADER_PAGES = 3
+
+PRIORITY_HEADINGS = [
+    "responsib", "requir", "qualif", "experience", "skill", "competenc",
+    "purpose", "summary", "profile", "duties", "education", "role",
+]
+LOW_PRIORITY_HEADINGS = [
+    "benefit", "equal opportunit", "eeo", "diversity", "about us", "about neogen",
+    "privacy", "disclaimer", "reference", "hobbies", "interests",
+]
+
+_PAGE_NUMBER = re.compile(r"^\s*(page\s*)?\d+\s*((of|/)\s*\d+)?\s*$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _encoder(model: str):
+    # tiktoken downloads its BPE files on first use, so without network any error here
+    # falls back to the estimate; None is cached so the download is not retried per call
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Exact count with tiktoken when installed, otherwise a ~4 chars/token estimate."""
+    if not text:
+        return 0
+    enc = _encoder(model)
+    if enc is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def input_budget(model: str, max_tokens: int, cap: int = INPUT_TOKEN_CAP) -> int:
+    """Prompt tokens available once max_tokens is reserved for the completion."""
+    window = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    return max(0, min(cap, window - max_tokens - SAFETY_MARGIN_TOKENS))
+
+
+def char_budget(model: str, max_tokens: int, cap: int = INPUT_TOKEN_CAP) -> int:
+    """
+    Characters worth extracting from an upload (max_chars for utils.parsers): twice the prompt
+    budget, so compact() still has whitespace and boilerplate to drop and sections to choose from.
+    """
+    return 2 * CHARS_PER_TOKEN * input_budget(model, max_tokens, cap)
+
+
+def remaining_budget(model: str, max_tokens: int, *fixed_parts: str, cap: int = INPUT_TOKEN_CAP) -> int:
+    """Budget left for variable documents after the fixed parts of a prompt."""
+    used = sum(count_tokens(p, model) for p in fixed_parts)
+    return max(0, input_budget(model, max_tokens, cap) - used)
+
+
+def _edge_indexes(page: List[str]) -> List[int]:
+    filled = [i for i, ln in enumerate(page) if ln]
+    return sorted(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+
+
+def normalise(text: str, strip_boilerplate: bool = True) -> Tuple[str, List[str]]:
+    """
+    Collapse runs of spaces and blank lines. With strip_boilerplate, also drop page-number
+    lines and all but the first copy of lines repeated at the top or bottom of several PDF
+    pages (headers/footers); only lines next to a page break are considered, so body text
+    such as a year or a repeated CV subheading is never touched.
+    Returns the text and notes on what was removed.
+    """
+    pages = [
+        [re.sub(r"[ \t\u00a0]+", " ", ln).strip() for ln in page.splitlines()]
+        for page in (text or "").split(PAGE_BREAK)
+    ]
+    notes = []
+
+    if strip_boilerplate and len(pages) > 1:
+        page_numbers = 0
+        for page in pages:
+            for i in _edge_indexes(page):
+                if _PAGE_NUMBER.match(page[i]):
+                    page[i] = ""
+                    page_numbers += 1
+        if page_numbers:
+            notes.append(f"{page_numbers} page-number lines")
+
+        edge_pages: Dict[str, int] = {}
+        for page in pages:
+            for ln in {page[i] for i in _edge_indexes(page) if len(page[i]) <= 120}:
+                edge_pages[ln] = edge_pages.get(ln, 0) + 1
+        repeated = {ln for ln, n in edge_pages.items() if n >= MIN_HEADER_PAGES}
+        if repeated:
+            seen = set()
+            dropped = 0
+            for page in pages:
+                for i in _edge_indexes(page):
+                    if page[i] in repeated:
+                        if page[i] in seen:
+                            page[i] = ""
+                            dropped += 1
+                        else:
+                            seen.add(page[i])
+            notes.append(f"{dropped} repeated header/footer lines")
+
+    out = re.sub(r"\n{3,}", "\n\n", "\n".join(ln for page in pages for ln in page)).strip()
+    return out, notes
+
+
+def _truncate(text: str, tokens: int, model: str) -> str:
+    """Leading part of text worth at most `tokens` tokens, cut mid-line if necessary."""
+    if tokens <= 0:
+        return ""
+    enc = _encoder(model)
+    if enc is None:
+        # count_tokens estimates len // CHARS_PER_TOKEN + 1, so this length estimates to exactly `tokens`
+        return text[:(tokens - 1) * CHARS_PER_TOKEN + CHARS_PER_TOKEN - 1]
+    return enc.decode(enc.encode(text, disallowed_special=())[:tokens])
+
+
+def _is_heading(line: str) -> bool:
+    if not line or len(line) > 60:
+        return False
+    if line.startswith("#") or line.endswith(":"):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+def _sections(text: str) -> List[Tuple[str, str]]:
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line in text.splitlines():
+        if _is_heading(line.strip()):
+            sections.append((line.strip(), [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(h, "\n".join(body)) for h, body in sections if "\n".join(body).strip()]
+
+
+def _priority(heading: str) -> int:
+    h = heading.lower()
+    if not heading:
+        return 1  # preamble: usually the profile or role summary
+    if any(k in h for k in PRIORITY_HEADINGS):
+        return 0
+    if any(k in h for k in LOW_PRIORITY_HEADINGS):
+        return 3
+    return 2
+
+
+def compact(text: str, budget_tokens: int, model: str = "gpt-4o-mini") -> Tuple[str, Dict[str, Any]]:
+    """
+    Fit a document into budget_tokens. Whitespace is always normalised; page headers, footers
+    and numbers are only stripped if the document is over budget. If it is still too long,
+    whole sections are kept in priority order (responsibilities, requirements, experience...
+    before benefits and legal text) and the first one that does not fit is cut by lines, or
+    inside a line when even its first line is too long. Sections keep their original order.
+    The report has original/final token counts, a trimmed flag and a human-readable summary.
+    """
+    original = count_tokens(text, model)
+    out, notes = normalise(text or "", strip_boilerplate=False)
+    tokens = count_tokens(out, model)
+    if tokens > budget_tokens:
+        out, notes = normalise(text or "")
+        tokens = count_tokens(out, model)
+
+    if tokens > budget_tokens:
+        sections = _sections(out)
+        costs = [count_tokens(body, model) for _, body in sections]
+        order = sorted(range(len(sections)), key=lambda i: (_priority(sections[i][0]), i))
+        kept: Dict[int, str] = {}
+        left = budget_tokens
+        dropped = []
+        for i in order:
+            heading, body = sections[i]
+            if costs[i] <= left:
+                kept[i] = body
+                left -= costs[i]
+                continue
+            if left > 0:
+                partial = []
+                for line in body.splitlines():
+                    cost = count_tokens(line, model) + 1
+                    if cost > left:
+                        # Keep the head of the line that does not fit, e.g. a CV with no newlines
+                        piece = _truncate(line, left - (1 if partial else 0), model)
+                        if piece.strip():
+                            partial.append(piece)
+                        left = 0
+                        break
+                    partial.append(line)
+                    left -= cost
+                if partial:
+                    kept[i] = "\n".join(partial)
+                    dropped.append(f"{heading or 'opening'} (cut short)")
+                    continue
+            dropped.append(heading or "opening")
+        out = "\n".join(kept[i] for i in sorted(kept))
+        tokens = count_tokens(out, model)
+        if dropped:
+            notes.append("sections dropped or cut: " + ", ".join(dropped))
+
+    report = {
+        "original_tokens": original,
+        "final_tokens": tokens,
+        "trimmed": bool(notes),
+        "notes": notes,
+        "summary": f"Input compacted from ~{original:,} to ~{tokens:,} tokens" + (f" ({'; '.join(notes)})" if notes else ""),
+    }
+    return out, report
@@ -0,0 +1,106 @@
+﻿import io
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.budget import char_budget, compact, remaining_budget
+from utils.llm import chat_complete_many
+from utils.parsers import UPLOAD_MAX_PAGES, extract_many_bytes
+from utils.prompts import (
+    ADVERT, GUIDE, QUESTIONS,
+    advert_messages, guide_messages, questions_messages, toolkit_messages,
+)
+
+# Same defaults as the individual pages 02-05
+PACK_DEFAULTS: Dict[str, Any] = {
+    "job_title": "",
+    "location": "Remote/Hybrid/Onsite",
+    "seniority": "Senior",
+    "style": "",
+    "salary_notes": "Competitive + benefits",
+    "apply_link": "https://careers.neogen.com",
+    "extra_opts": "",
+    "duration": "60 mins",
+    "key_competencies": "Ownership\nCollaboration\nCustomer Focus\nTechnical depth",
+    "custom_notes": "",
+    "focus": ["Behavioral", "Technical"],
+    "custom": "",
+    "region": "USA / EMEA / LATAM / APAC",
+    "stack": "Workday, Teams, Calendly, Docusign, Vetting Providers",
+    "notes": "",
+}
+
+ARTIFACTS = [
+    ("advert", "Job Advert", "Advert"),
+    ("guide", "Interview Guide", "Interview_Guide"),
+    ("questions", "Interview Questions", "Interview_Questions"),
+    ("toolkit", "Hiring Manager Toolkit", "Hiring_Manager_Toolkit"),
+]
+
+
+def pack_requests(model: str, jd_text: str, opts: Dict[str, Any], temperature: float, max_tokens: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    chat_complete_many requests for every artifact, in ARTIFACTS order. The JD is compacted once,
+    to the tightest budget of the prompts that embed it. Returns (requests, compaction summary or None).
+    """
+    o = {**PACK_DEFAULTS, **opts}
+    budget = min(
+        remaining_budget(model, max_tokens, ADVERT.static(o["style"]), o["extra_opts"]),
+        remaining_budget(model, max_tokens, GUIDE.static(), o["key_competencies"], o["custom_notes"]),
+        remaining_budget(model, max_tokens, QUESTIONS.static(), o["custom"]),
+    )
+    jd_text, report = compact(jd_text, budget, model)
+    messages = {
+        "advert": advert_messages(o["style"], o["job_title"], o["location"], o["salary_notes"], o["apply_link"], jd_text, o["extra_opts"]),
+        "guide": guide_messages(o["job_title"], o["seniority"], o["duration"], o["key_competencies"], jd_text, o["custom_notes"]),
+        "questions": questions_messages(o["job_title"], o["seniority"], o["focus"], jd_text, o["custom"]),
+        "toolkit": toolkit_messages(o["job_title"], o["region"], o["stack"], o["notes"]),
+    }
+    reqs = [
+        {"model": model, "messages": messages[key], "temperature": temperature, "max_tokens": max_tokens}
+        for key, _, _ in ARTIFACTS
+    ]
+    return reqs, report["summary"] if report["trimmed"] else None
+
+
+def run_hiring_pack(
+    job,
+    model: str,
+    jd_file: Tuple[str, bytes],
+    opts: Dict[str, Any],
+    temperature: float = 0.2,
+    max_tokens: int = 1500,
+    use_cache: bool = True,
+) -> str:
+    """
+    Background job (see utils.jobs): extract the JD once and generate all four artifacts
+    concurrently, so the pack takes about as long as its slowest document.
+    use_cache=False regenerates every artifact instead of reusing cached responses.
+    The per-artifact files are noted as "files" ([file_name, text] pairs) for bundle(), with "zip_name".
+    """
+    job.progress(0.0, "Reading the JD...")
+    jd_text = extract_many_bytes([jd_file], max_pages=UPLOAD_MAX_PAGES, max_chars=char_budget(model, max_tokens))[0]
+    reqs, budget_summary = pack_requests(model, jd_text, opts, temperature, max_tokens)
+    if budget_summary:
+        job.note("budget_summary", budget_summary)
+
+    job.progress(0.05, f"Generating {len(reqs)} documents...")
+    results = chat_complete_many(reqs, max_workers=job.batch_workers, use_cache=use_cache, on_progress=lambda done, total: job.progress(done / total, f"Generated {done}/{total} documents"))
+
+    stem = opts.get("job_title") or "role"
+    # Failed artifacts are listed in "failed" rather than zipped as error text
+    files = [[f"{stem}_{suffix}.md", r["text"]] for (_, _, suffix), r in zip(ARTIFACTS, results) if r["error"] is None]
+    failed = [title for (_, title, _), r in zip(ARTIFACTS, results) if r["error"] is not None]
+    if failed:
+        job.note("failed", failed)
+    job.note("files", files)
+    job.note("zip_name", f"{stem}_Hiring_Pack.zip")
+    return "\n\n---\n\n".join(f"# {title}\n\n{r['text']}" for (_, title, _), r in zip(ARTIFACTS, results))
+
+
+def bundle(files: List[List[str]]) -> bytes:
+    """Zip the pack's Markdown files for a single download."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, text in files:
+            zf.writestr(name, text)
+    return buf.getvalue()
@@ -0,0 +1,158 @@
+﻿import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from utils import telemetry
+
+JOBS_PATH = Path("data/jobs.db")
+JOB_WORKERS = int(os.getenv("NEOGEN_JOB_WORKERS", 4))
+# Upper bound on LLM requests in flight from all jobs together; each running job gets an equal share
+JOB_MAX_INFLIGHT = int(os.getenv("NEOGEN_JOB_MAX_INFLIGHT", 16))
+JOB_RETENTION_DAYS = float(os.getenv("NEOGEN_JOB_RETENTION_DAYS", 7))
+# Streamed output is written back at most this often so pollers see it grow
+PARTIAL_FLUSH_SECONDS = 0.5
+
+ACTIVE = ("queued", "running")
+
+_conn: Optional[sqlite3.Connection] = None
+_conn_path: Optional[Path] = None
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn, _conn_path
+    if _conn is None or _conn_path != JOBS_PATH:
+        JOBS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(JOBS_PATH, timeout=5, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            page TEXT,
+            status TEXT NOT NULL,
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            result TEXT,
+            meta TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        # Anything still queued or running belongs to a previous process and will never finish
+        conn.execute(
+            "UPDATE jobs SET status = 'error', error = 'Interrupted by a server restart', finished_at = ? WHERE status IN ('queued', 'running')",
+            (time.time(),),
+        )
+        conn.execute("DELETE FROM jobs WHERE created_at < ?", (time.time() - JOB_RETENTION_DAYS * 86400,))
+        conn.commit()
+        _conn, _conn_path = conn, JOBS_PATH
+    return _conn
+
+
+def _update(job_id: str, **fields) -> None:
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with _lock:
+        conn = _connect()
+        conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="neogen-job")
+    return _executor
+
+
+class Job:
+    """Handle passed to a running job function for reporting progress and side results."""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.meta: Dict[str, Any] = {}
+        # max_workers for any chat_complete_many the job runs, so JOB_WORKERS jobs stay within JOB_MAX_INFLIGHT
+        self.batch_workers = max(1, JOB_MAX_INFLIGHT // JOB_WORKERS)
+
+    def progress(self, fraction: float, message: str = "") -> None:
+        _update(self.id, progress=max(0.0, min(1.0, fraction)), message=message)
+
+    def note(self, key: str, value: Any) -> None:
+        # Extra JSON-serialisable output (warnings, intermediate summaries) shown alongside the result
+        self.meta[key] = value
+        _update(self.id, meta=json.dumps(self.meta))
+
+
+def _run(job_id: str, page: str, fn: Callable, args: tuple, kwargs: dict) -> None:
+    telemetry.set_page(page)
+    _update(job_id, status="running", started_at=time.time())
+    job = Job(job_id)
+    try:
+        out = fn(job, *args, **kwargs)
+        if not isinstance(out, str):
+            # Iterators of text deltas (e.g. chat_stream) are accumulated with periodic partial writes
+            parts: List[str] = []
+            last = time.perf_counter()
+            for delta in out:
+                parts.append(delta)
+                if time.perf_counter() - last >= PARTIAL_FLUSH_SECONDS:
+                    _update(job_id, result="".join(parts))
+                    last = time.perf_counter()
+            out = "".join(parts)
+        _update(job_id, status="done", progress=1.0, result=out, finished_at=time.time())
+    except Exception as e:
+        _update(job_id, status="error", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+
+
+def submit(kind: str, fn: Callable, *args, page: Optional[str] = None, **kwargs) -> str:
+    """
+    Queue fn(job, *args, **kwargs) on the shared worker pool and return its job id.
+    fn returns the result text, or an iterator of text deltas that is saved as it streams.
+    At most JOB_WORKERS jobs run at once; the rest wait in submission order. Jobs that fan out
+    should size their batches with job.batch_workers, keeping the process at JOB_MAX_INFLIGHT requests.
+    Arguments must not reference per-run Streamlit objects: read uploads to bytes first.
+    """
+    job_id = uuid.uuid4().hex
+    page = page or telemetry.current_page()
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT INTO jobs (id, kind, page, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, kind, page, time.time()),
+        )
+        conn.commit()
+    _get_executor().submit(_run, job_id, page, fn, args, kwargs)
+    return job_id
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    """Job row as a dict (meta decoded), with queue_position for queued jobs; None if unknown."""
+    with _lock:
+        conn = _connect()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["meta"] = json.loads(job["meta"]) if job["meta"] else {}
+        job["queue_position"] = None
+        if job["status"] == "queued":
+            job["queue_position"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job["created_at"],)
+            ).fetchone()[0] + 1
+    return job
+
@@ -0,0 +1,65 @@
+﻿from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+
+from utils import jobs
+from utils.llm import chat_stream
+
+POLL_SECONDS = 1.0
+
+
+def _chat_job(job: jobs.Job, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int, use_cache: bool = True):
+    return chat_stream(model, messages, temperature=temperature, max_tokens=max_tokens, use_cache=use_cache)
+
+
+def submit(state_key: str, kind: str, fn: Callable, *args, file_name: str = "output.md", **kwargs) -> str:
+    """Queue a job and remember it in session state, so its output survives reruns and page switches."""
+    job_id = jobs.submit(kind, fn, *args, **kwargs)
+    st.session_state[state_key] = {"id": job_id, "file_name": file_name}
+    return job_id
+
+
+def submit_chat(state_key: str, kind: str, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                file_name: str = "output.md", use_cache: bool = True) -> str:
+    """Stream one chat completion as a job; use_cache=False skips the response cache (the pages' Regenerate button)."""
+    return submit(state_key, kind, _chat_job, model, messages, temperature, max_tokens, use_cache=use_cache, file_name=file_name)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _poll(job_id: str) -> None:
+    job = jobs.get(job_id)
+    if job is None or job["status"] not in jobs.ACTIVE:
+        st.rerun()
+    if job["status"] == "queued":
+        st.info(f"Queued - position {job['queue_position']}. You can leave this page; the result will be here when you return.")
+    else:
+        st.progress(job["progress"], text=job["message"] or "Generating...")
+    if job["result"]:
+        st.markdown(job["result"])
+
+
+def job_output(state_key: str, render_meta: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Show the job remembered under state_key: live progress and partial output while it runs,
+    then the result with a Markdown download. render_meta(meta) can draw extra job output first.
+    """
+    entry = st.session_state.get(state_key)
+    if not entry:
+        return None
+    job = jobs.get(entry["id"])
+    if job is None:
+        return None
+
+    st.markdown("### Output")
+    if job["status"] in jobs.ACTIVE:
+        _poll(job["id"])
+        return job
+    if render_meta and job["meta"]:
+        render_meta(job["meta"])
+    if job["status"] == "error":
+        st.error(f"Generation failed: {job['error']}")
+        return job
+    out = job["result"] or ""
+    st.markdown(out)
+    st.download_button("Download as .md", data=out.encode("utf-8"), file_name=entry["file_name"], mime="text/markdown", key=f"dl_{job['id']}")
+    return job
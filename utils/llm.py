@@ -1,51 +1,368 @@
 ﻿import os
-from typing import List, Dict, Any, Optional
+import json
+import hashlib
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Callable, Tuple
+
+from utils.cache import DiskCache
+from utils.ratelimit import RateLimiter
+from utils.budget import count_tokens
+from utils import telemetry
+
+CACHE_PATH = Path("data/llm_cache.db")
+CACHE_TTL_SECONDS = float(os.getenv("NEOGEN_LLM_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.getenv("NEOGEN_LLM_CACHE_MAX_ENTRIES", 2000))
+CACHE_MAX_BYTES = int(os.getenv("NEOGEN_LLM_CACHE_MAX_BYTES", 50_000_000))
+
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("NEOGEN_LLM_TIMEOUT", 120))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("NEOGEN_LLM_CONNECT_TIMEOUT", 10))
+MAX_CONNECTIONS = int(os.getenv("NEOGEN_LLM_MAX_CONNECTIONS", 20))
+# Retries for single interactive calls; done here rather than in the SDK so telemetry sees every attempt
+MAX_RETRIES = int(os.getenv("NEOGEN_LLM_RETRIES", 2))
+RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("NEOGEN_LLM_RETRY_MAX_BACKOFF", 8))
+
+BATCH_MAX_WORKERS = int(os.getenv("NEOGEN_LLM_BATCH_WORKERS", 8))
+BATCH_MAX_ATTEMPTS = int(os.getenv("NEOGEN_LLM_BATCH_ATTEMPTS", 5))
+REQUESTS_PER_MINUTE = float(os.getenv("NEOGEN_LLM_RPM", 500))
+TOKENS_PER_MINUTE = float(os.getenv("NEOGEN_LLM_TPM", 200_000))
+
+NO_KEY_MESSAGE = "No OpenAI API key found. Add it to .streamlit/secrets.toml (OPENAI_API_KEY) or as env var."
+
+_response_cache: Optional[DiskCache] = None
+_client = None
+_client_lock = threading.Lock()
+_rate_limiter: Optional[RateLimiter] = None
+
+
+class LLMError(Exception):
+    """
+    An OpenAI failure classified into a coarse kind:
+    no_key, auth, rate_limit, timeout, connection, bad_request, server, unknown.
+    """
+
+    RETRYABLE = ("rate_limit", "timeout", "connection", "server")
+
+    def __init__(self, kind: str, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in self.RETRYABLE
+
+    def as_text(self) -> str:
+        if self.kind == "no_key":
+            return f"[ERROR] {self}"
+        return f"[ERROR] OpenAI call failed ({self.kind}): {self}"
 
 def _get_api_key() -> Optional[str]:
-    # Prefer Streamlit secrets if available
+    key = os.getenv("OPENAI_API_KEY")
+    if key:
+        return key
+    # Streamlit secrets only when running under Streamlit; importing it here would drag it into the CLI
+    if "streamlit" in sys.modules:
+        try:
+            import streamlit as st
+            key = st.secrets.get("OPENAI_API_KEY", None)
+            if key:
+                return str(key)
+        except Exception:
+            pass
+    return None
+
+def get_client():
+    """
+    Process-wide OpenAI client sharing one pooled keep-alive HTTP connection pool.
+    Returns None when no API key is configured. The SDK's own retries are off; callers
+    retry retryable LLMErrors themselves so each attempt is counted.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            api_key = _get_api_key()
+            if not api_key:
+                return None
+            import httpx
+            from openai import OpenAI
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            )
+            _client = OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+    return _client
+
+def reset_client() -> None:
+    # Drop the shared client, e.g. after the API key has been rotated
+    global _client
+    with _client_lock:
+        if _client is not None:
+            try:
+                _client.close()
+            except Exception:
+                pass
+        _client = None
+
+def _classify_error(e: Exception) -> LLMError:
+    if isinstance(e, LLMError):
+        return e
+    import openai
+    status = getattr(e, "status_code", None)
+    if isinstance(e, openai.AuthenticationError) or isinstance(e, openai.PermissionDeniedError):
+        kind = "auth"
+    elif isinstance(e, openai.RateLimitError):
+        kind = "rate_limit"
+    elif isinstance(e, openai.APITimeoutError):
+        kind = "timeout"
+    elif isinstance(e, openai.APIConnectionError):
+        kind = "connection"
+    elif isinstance(e, openai.APIStatusError):
+        kind = "server" if status and status >= 500 else "bad_request"
+    else:
+        kind = "unknown"
+    retry_after = None
+    response = getattr(e, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    return LLMError(kind, str(e), status, retry_after)
+
+def _backoff_seconds(attempt: int, e: LLMError, cap: float) -> float:
+    # Jittered exponential backoff, but never sooner than the server's Retry-After
+    return max(min(cap, 2 ** (attempt - 1)) * random.uniform(0.5, 1.5), e.retry_after or 0.0)
+
+def get_response_cache() -> DiskCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = DiskCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_TTL_SECONDS)
+    return _response_cache
+
+def cache_stats() -> Dict[str, Any]:
+    return get_response_cache().stats()
+
+def _request_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def chat_complete(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 1500, use_cache: bool = True) -> str:
+    """
+    Send a chat completion through the shared OpenAI client and return the text.
+    Identical requests are answered from the on-disk response cache unless use_cache=False.
+    Failures are returned as "[ERROR] ..." text, as the pages render whatever comes back.
+    """
+    t0 = time.perf_counter()
+    key = _request_key(model, messages, temperature, max_tokens)
+    cached = _cache_lookup(key) if use_cache else None
+    if cached is not None:
+        _record("complete", model, "cache_hit", t0, max_tokens=max_tokens)
+        return cached
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            out, usage = _create_completion(model, messages, temperature, max_tokens)
+            break
+        except LLMError as e:
+            if not e.retryable or attempt > MAX_RETRIES:
+                _record("complete", model, e.kind, t0, attempts=attempt, max_tokens=max_tokens)
+                return e.as_text()
+            time.sleep(_backoff_seconds(attempt, e, RETRY_MAX_BACKOFF_SECONDS))
+    _record("complete", model, "ok", t0, usage=usage, attempts=attempt, max_tokens=max_tokens)
+    _cache_store(key, out)
+    return out
+
+def chat_stream(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 1500, use_cache: bool = True) -> Iterator[str]:
+    """
+    Streaming counterpart of chat_complete: yields text deltas as they arrive.
+    Cache hits are yielded in one piece; the assembled text is cached once the stream completes.
+    """
+    t0 = time.perf_counter()
+    key = _request_key(model, messages, temperature, max_tokens)
+    cached = _cache_lookup(key) if use_cache else None
+    if cached is not None:
+        _record("stream", model, "cache_hit", t0, ttft_s=time.perf_counter() - t0, max_tokens=max_tokens)
+        yield cached
+        return
+
+    parts = []
+    usage: Dict[str, Any] = {}
+    ttft = None
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            for delta in _stream_completion(model, messages, temperature, max_tokens, usage):
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                parts.append(delta)
+                yield delta
+            break
+        except LLMError as e:
+            # Only retry before anything has been shown; a restarted stream would repeat it
+            if not e.retryable or parts or attempt > MAX_RETRIES:
+                _record("stream", model, e.kind, t0, ttft_s=ttft, attempts=attempt, max_tokens=max_tokens)
+                # Text already shown to the user cannot be retracted, so append the error after it
+                yield ("\n\n" if parts else "") + e.as_text()
+                return
+            time.sleep(_backoff_seconds(attempt, e, RETRY_MAX_BACKOFF_SECONDS))
+    _record("stream", model, "ok", t0, usage=usage, ttft_s=ttft, attempts=attempt, max_tokens=max_tokens)
+    _cache_store(key, "".join(parts))
+
+def _record(kind: str, model: str, outcome: str, t0: float, usage: Optional[Dict[str, Any]] = None, **fields) -> None:
+    usage = usage or {}
+    telemetry.record(
+        kind, model, outcome, time.perf_counter() - t0,
+        prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+        cached_tokens=usage.get("cached_tokens"), **fields
+    )
+
+def _cache_lookup(key: str) -> Optional[str]:
+    try:
+        return get_response_cache().get(key)
+    except Exception:
+        return None
+
+def _cache_store(key: str, out: str) -> None:
+    if not out or out.startswith("[ERROR]"):
+        return
     try:
-        import streamlit as st
-        key = st.secrets.get("OPENAI_API_KEY", None)
-        if key:
-            return str(key)
+        get_response_cache().set(key, out)
     except Exception:
         pass
-    # Fallback to env var
-    return os.getenv("OPENAI_API_KEY")
 
-def chat_complete(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 1500) -> str:
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+    return _rate_limiter
+
+def _estimate_tokens(model: str, messages: List[Dict[str, str]], max_tokens: int) -> int:
+    # TPM limits count the completion budget as well as the prompt
+    return sum(count_tokens(m.get("content") or "", model) for m in messages) + max_tokens
+
+def chat_complete_many(
+    requests: List[Dict[str, Any]],
+    max_workers: int = BATCH_MAX_WORKERS,
+    max_attempts: int = BATCH_MAX_ATTEMPTS,
+    use_cache: bool = True,
+    limiter: Optional[RateLimiter] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
     """
-    Adapter that tries the new OpenAI SDK first (client.chat.completions.create),
-    then falls back to legacy openai.ChatCompletion.create if needed.
+    Run many completions concurrently on a bounded thread pool.
+    Each request is a dict of chat_complete keyword arguments (model, messages, temperature, max_tokens).
+    Calls share the RPM/TPM token buckets, and rate-limit, timeout, connection and 5xx failures are
+    retried with jittered exponential backoff. Results come back in request order as dicts with
+    "text", "error" (None on success) and "attempts". on_progress(done, total) and
+    on_result(index, result), fired as each request finishes, are called from the calling thread,
+    so they may safely update Streamlit elements or write checkpoints.
     """
-    api_key = _get_api_key()
-    if not api_key:
-        return "[ERROR] No OpenAI API key found. Add it to .streamlit/secrets.toml (OPENAI_API_KEY) or as env var."
+    limiter = limiter or get_rate_limiter()
+    # Worker threads do not inherit the caller's context, so capture the page for telemetry here
+    page = telemetry.current_page()
+    def run(req: Dict[str, Any]) -> Dict[str, Any]:
+        model = req["model"]
+        messages = req["messages"]
+        temperature = req.get("temperature", 0.2)
+        max_tokens = req.get("max_tokens", 1500)
+        t0 = time.perf_counter()
+        key = _request_key(model, messages, temperature, max_tokens)
+        cached = _cache_lookup(key) if use_cache else None
+        if cached is not None:
+            _record("batch", model, "cache_hit", t0, page=page, attempts=0, max_tokens=max_tokens)
+            return {"text": cached, "error": None, "attempts": 0}
+
+        attempt = 0
+        while True:
+            attempt += 1
+            limiter.acquire(_estimate_tokens(model, messages, max_tokens))
+            try:
+                out, usage = _create_completion(model, messages, temperature, max_tokens)
+            except LLMError as e:
+                if not e.retryable or attempt >= max_attempts:
+                    _record("batch", model, e.kind, t0, page=page, attempts=attempt, max_tokens=max_tokens)
+                    return {"text": e.as_text(), "error": e, "attempts": attempt}
+                time.sleep(_backoff_seconds(attempt, e, 60.0))
+                continue
+            _record("batch", model, "ok", t0, usage=usage, page=page, attempts=attempt, max_tokens=max_tokens)
+            _cache_store(key, out)
+            return {"text": out, "error": None, "attempts": attempt}
+
+    if not requests:
+        return []
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as pool:
+        futures = {pool.submit(run, req): i for i, req in enumerate(requests)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            results[futures[fut]] = fut.result()
+            if on_result:
+                on_result(futures[fut], results[futures[fut]])
+            if on_progress:
+                on_progress(done, len(requests))
+    return results
 
-    # New SDK path
+def _usage_dict(usage) -> Dict[str, Any]:
+    if usage is None:
+        return {}
+    # Prompt tokens served from the provider's prefix cache; absent on older models and SDKs
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
+
+def _create_completion(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Tuple[str, Dict[str, Any]]:
+    client = get_client()
+    if client is None:
+        raise LLMError("no_key", NO_KEY_MESSAGE)
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
         resp = client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens
         )
-        return resp.choices[0].message.content
-    except Exception:
-        pass
+    except Exception as e:
+        raise _classify_error(e) from e
+    return resp.choices[0].message.content or "", _usage_dict(resp.usage)
 
-    # Legacy SDK path
+def _stream_completion(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int, usage: Dict[str, Any]) -> Iterator[str]:
+    # `usage` is filled from the final chunk, which carries token counts and no choices
+    client = get_client()
+    if client is None:
+        raise LLMError("no_key", NO_KEY_MESSAGE)
     try:
-        import openai
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(
+        stream = client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
         )
-        return resp["choices"][0]["message"]["content"]
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage.update(_usage_dict(chunk.usage))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
     except Exception as e:
-        return f"[ERROR] OpenAI call failed: {e}"
+        raise _classify_error(e) from e
@@ -1,39 +1,303 @@
-﻿from typing import Optional
+﻿import codecs
+import hashlib
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
+from typing import Optional, List, Tuple, Iterator
 from io import BytesIO
 from pathlib import Path
 
-def extract_text(uploaded_file) -> str:
+from utils.cache import DiskCache
+from utils.budget import PAGE_BREAK
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+PARSER_VERSION = 4
+
+PDF_PAGES_PER_TASK = 20
+_PDF_PAGE = re.compile(rb"/Type\s*/Page(?![s\w])")
+READ_CHUNK_BYTES = 1024 * 1024
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("NEOGEN_EXTRACT_TIMEOUT", 60))
+# Page cap for uploads sent to the model; a scanned PDF has no text, so max_chars alone never stops it
+UPLOAD_MAX_PAGES = int(os.getenv("NEOGEN_UPLOAD_MAX_PAGES", 50))
+
+EXTRACT_CACHE_PATH = Path("data/extract_cache.db")
+EXTRACT_CACHE_MAX_ENTRIES = int(os.getenv("NEOGEN_EXTRACT_CACHE_MAX_ENTRIES", 5000))
+EXTRACT_CACHE_MAX_BYTES = int(os.getenv("NEOGEN_EXTRACT_CACHE_MAX_BYTES", 200_000_000))
+
+_extract_cache: Optional[DiskCache] = None
+
+def get_extract_cache() -> DiskCache:
+    global _extract_cache
+    if _extract_cache is None:
+        # Keys are content hashes, so entries never go stale; only LRU size limits apply
+        _extract_cache = DiskCache(EXTRACT_CACHE_PATH, max_entries=EXTRACT_CACHE_MAX_ENTRIES, max_bytes=EXTRACT_CACHE_MAX_BYTES, ttl_seconds=None)
+    return _extract_cache
+
+def _content_key(name: str, digest: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    # The extension picks the parser, so it is part of the key alongside the content hash;
+    # capped extractions are stored separately from full ones
+    key = f"v{PARSER_VERSION}:{Path(name).suffix.lower()}:{digest}"
+    if max_pages is not None or max_chars is not None:
+        key += f":p{max_pages}:c{max_chars}"
+    return key
+
+def _hash_stream(f) -> str:
+    h = hashlib.sha256()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(READ_CHUNK_BYTES), b""):
+        h.update(chunk)
+    f.seek(0)
+    return h.hexdigest()
+
+def _cache_get(key: str) -> Optional[str]:
+    try:
+        return get_extract_cache().get(key)
+    except Exception:
+        return None
+
+def _cache_put(key: str, text: str) -> None:
+    if not text:
+        return
+    try:
+        get_extract_cache().set(key, text)
+    except Exception:
+        pass
+
+def extract_text(uploaded_file, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
     """
     Accepts Streamlit UploadedFile for .txt, .docx, .pdf
+    Parsing stops early at max_pages (PDF only) or max_chars, see iter_text.
+    Results are cached by content hash and caps, so a document seen before is not re-parsed.
     """
     if uploaded_file is None:
         return ""
-    name = uploaded_file.name.lower()
-    data = uploaded_file.read()
+    key = _content_key(uploaded_file.name, _hash_stream(uploaded_file), max_pages, max_chars)
+    text = _cache_get(key)
+    if text is None:
+        text = "".join(iter_text(uploaded_file, max_pages=max_pages, max_chars=max_chars))
+        _cache_put(key, text)
+    return text
 
-    if name.endswith(".txt"):
-        try:
-            return data.decode("utf-8", errors="ignore")
-        except Exception:
-            return data.decode("latin-1", errors="ignore")
+def extract_bytes(name: str, data: bytes, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    return "".join(iter_text(BytesIO(data), name=name, max_pages=max_pages, max_chars=max_chars))
+
+def iter_text(source, name: Optional[str] = None, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    Lazily yield a document's text page by page (PDF), paragraph by paragraph (DOCX)
+    or in fixed-size chunks (text). "".join() of the pieces equals the full extraction;
+    PDF pages are separated by budget.PAGE_BREAK (a form feed).
+    Parsing stops as soon as max_pages or max_chars is reached. max_pages only applies to PDFs;
+    DOCX and text files have no pages, so bound those with max_chars.
+    `source` is a binary file-like object (its .name picks the parser unless `name` is given) or bytes.
+    """
+    if source is None:
+        return
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    name = (name or getattr(source, "name", "")).lower()
+
+    blocks = _iter_blocks(source, name, max_pages)
+    try:
+        if max_chars is None:
+            yield from blocks
+            return
+        remaining = max_chars
+        for block in blocks:
+            if len(block) >= remaining:
+                yield block[:remaining]
+                return
+            remaining -= len(block)
+            yield block
+    finally:
+        blocks.close()
 
+def _iter_blocks(f, name: str, max_pages: Optional[int]) -> Iterator[str]:
     if name.endswith(".docx"):
-        from docx import Document
-        f = BytesIO(data)
-        doc = Document(f)
-        return "\n".join([p.text for p in doc.paragraphs])
+        for i, block in enumerate(_iter_docx_blocks(f)):
+            yield ("\n" if i else "") + block
+        return
 
     if name.endswith(".pdf"):
         from pypdf import PdfReader
-        f = BytesIO(data)
         reader = PdfReader(f)
-        text = []
-        for page in reader.pages:
-            text.append(page.extract_text() or "")
-        return "\n".join(text)
+        stop = len(reader.pages) if max_pages is None else min(max_pages, len(reader.pages))
+        for i in range(stop):
+            yield (PAGE_BREAK if i else "") + (reader.pages[i].extract_text() or "")
+        return
 
-    # Fallback to best-effort decode
-    try:
-        return data.decode("utf-8", errors="ignore")
-    except Exception:
-        return str(data)
+    # .txt and anything else: best-effort incremental UTF-8 decode
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    for chunk in iter(lambda: f.read(READ_CHUNK_BYTES), b""):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+def _iter_docx_blocks(f) -> Iterator[str]:
+    """
+    Stream word/document.xml straight out of the zip and yield body paragraphs and
+    table rows (cells joined with " | ") in reading order. Unlike python-docx this never
+    builds the full object model and does not skip tables.
+    """
+    with zipfile.ZipFile(f) as zf, zf.open("word/document.xml") as xml:
+        # Open paragraphs, innermost last: a text box (w:txbxContent) nests whole paragraphs
+        # inside a run of the enclosing one
+        paras: List[List[str]] = []
+        runs = 0
+        # Inside mc:Fallback, which repeats the mc:Choice content (e.g. a text box as VML)
+        fallback = 0
+        # One entry per open table row: (cells, paragraphs of the current cell)
+        rows: List[Tuple[List[str], List[str]]] = []
+        for event, elem in iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if tag == _MC_FALLBACK:
+                fallback += 1 if event == "start" else -1
+                if event == "end":
+                    elem.clear()
+                continue
+            if fallback:
+                continue
+            if event == "start":
+                if tag == _W + "p":
+                    paras.append([])
+                elif tag == _W + "r":
+                    runs += 1
+                elif tag == _W + "tr":
+                    rows.append(([], []))
+                elif tag == _W + "tc" and rows:
+                    rows[-1][1].clear()
+                continue
+
+            if tag == _W + "r":
+                runs -= 1
+            elif tag == _W + "t" and paras:
+                paras[-1].append(elem.text or "")
+            elif tag == _W + "tab" and runs and paras:
+                # w:tab also defines tab stops under w:pPr/w:tabs; only a run's tab is text
+                paras[-1].append("\t")
+            elif tag in (_W + "br", _W + "cr") and paras:
+                paras[-1].append("\n")
+            elif tag == _W + "p" and paras:
+                text = "".join(paras.pop())
+                if rows:
+                    rows[-1][1].append(text)
+                else:
+                    yield text
+                elem.clear()
+            elif tag == _W + "tc" and rows:
+                cells, cell_paras = rows[-1]
+                cells.append(" ".join(t for t in cell_paras if t))
+            elif tag == _W + "tr" and rows:
+                cells, _ = rows.pop()
+                line = " | ".join(cells)
+                if rows:
+                    # Nested table: the row becomes part of the enclosing cell
+                    rows[-1][1].append(line)
+                else:
+                    yield line
+                elem.clear()
+
+def _extract_pdf_pages(data: bytes, start: int = 0, stop: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    from pypdf import PdfReader
+    f = BytesIO(data)
+    reader = PdfReader(f)
+    text = []
+    size = 0
+    for page in reader.pages[start:stop]:
+        text.append(page.extract_text() or "")
+        size += len(text[-1]) + len(PAGE_BREAK)
+        if max_chars is not None and size >= max_chars:
+            break
+    return PAGE_BREAK.join(text)[:max_chars]
+
+def _pdf_page_estimate(data: bytes) -> int:
+    # Counts page objects in the raw bytes rather than parsing in this process, where a malformed
+    # file would have no timeout. Pages inside compressed object streams are missed, which only
+    # means the document is read by one worker.
+    return len(_PDF_PAGE.findall(data))
+
+def _plan_pdf(data: bytes, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> List[Tuple]:
+    # Large PDFs are split into page ranges (up to max_pages) so one document can use several
+    # cores; each range also stops at max_chars, and the joined text is cut to it afterwards
+    pages = _pdf_page_estimate(data)
+    if max_pages is not None:
+        pages = min(pages, max_pages)
+    if pages > PDF_PAGES_PER_TASK:
+        return [(_extract_pdf_pages, (data, i, min(i + PDF_PAGES_PER_TASK, pages), max_chars)) for i in range(0, pages, PDF_PAGES_PER_TASK)]
+    return [(_extract_pdf_pages, (data, 0, max_pages, max_chars))]
+
+def extract_many(uploaded_files, max_workers: Optional[int] = None, timeout: float = EXTRACT_TIMEOUT_SECONDS,
+                 max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Extract text from many uploaded files, preserving order. PDFs are parsed on a process pool,
+    large ones split into page ranges; TXT and DOCX are parsed in-process, where they are cheap.
+    Documents already in the extraction cache are not parsed at all.
+    A file that fails to parse, or a PDF that takes longer than `timeout` seconds once it is waited on,
+    comes back as "". A timed-out worker is terminated with its pool and the remaining files
+    continue on a fresh pool, so one hung document cannot starve the others.
+    max_pages and max_chars cap each document as in extract_text.
+    """
+    return extract_many_bytes([(f.name, f.read()) for f in uploaded_files if f is not None], max_workers, timeout, max_pages, max_chars)
+
+def extract_many_bytes(files: List[Tuple[str, bytes]], max_workers: Optional[int] = None, timeout: float = EXTRACT_TIMEOUT_SECONDS,
+                       max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> List[str]:
+    """extract_many for (filename, bytes) pairs, e.g. uploads read up front for a background job."""
+    keys = [_content_key(name, hashlib.sha256(data).hexdigest(), max_pages, max_chars) for name, data in files]
+    results: List[Optional[str]] = [_cache_get(key) for key in keys]
+    todo = [i for i, text in enumerate(results) if text is None]
+
+    for i, text in zip(todo, _extract_uncached([files[i] for i in todo], max_workers, timeout, max_pages, max_chars)):
+        results[i] = text
+        _cache_put(keys[i], text)
+    return results
+
+def _extract_uncached(files: List[Tuple[str, bytes]], max_workers: Optional[int], timeout: float,
+                      max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> List[str]:
+    results: List[str] = [""] * len(files)
+    pdfs = []
+    for i, (name, data) in enumerate(files):
+        if name.lower().endswith(".pdf"):
+            pdfs.append(i)
+            continue
+        # TXT and DOCX stream in-process in milliseconds; a spawned worker would cost far more
+        try:
+            results[i] = extract_bytes(name, data, max_pages, max_chars)
+        except Exception:
+            pass
+    if not pdfs:
+        return results
+
+    # Every PDF goes through the pool, even a single one, so a pathological file cannot hang the caller
+    plans = {i: _plan_pdf(files[i][1], max_pages, max_chars) for i in pdfs}
+    todo = pdfs
+    while todo:
+        n = sum(len(plans[i]) for i in todo)
+        pool = multiprocessing.get_context("spawn").Pool(max(1, min(n, max_workers or os.cpu_count() or 1)))
+        try:
+            pending = {i: [pool.apply_async(fn, args) for fn, args in plans[i]] for i in todo}
+            for pos, i in enumerate(todo):
+                deadline = time.monotonic() + timeout
+                try:
+                    parts = [h.get(max(0.0, deadline - time.monotonic())) for h in pending[i]]
+                    # A range past the real last page (the page count is an estimate) comes back empty
+                    results[i] = PAGE_BREAK.join(p for p in parts if p)[:max_chars]
+                except multiprocessing.TimeoutError:
+                    # The stuck worker keeps its slot, so the files after this one get a fresh pool
+                    todo = todo[pos + 1:]
+                    break
+                except Exception:
+                    pass  # a parse failure raised in the worker
+            else:
+                todo = []
+        finally:
+            # terminate() also kills any worker still stuck on a pathological file
+            pool.terminate()
+    return results
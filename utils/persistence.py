@@ -1,14 +1,68 @@
-﻿import sqlite3
+﻿import csv
+import hashlib
+import io
+import json
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple, Optional
+from datetime import datetime
+from typing import List, Tuple, Optional, Iterator, Any, Dict, Iterable
+
+from utils.attachments import store_blob
 
 DB_PATH = Path("data/interview_feedback.db")
 
-def init_db():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+
+FEEDBACK_COLUMNS = ["id", "requisition", "candidate", "interviewer", "rating", "comments", "attachments", "created_at"]
+PAGE_SIZE = 50
+EXPORT_CHUNK_ROWS = 2000
+IMPORT_BATCH_ROWS = 10_000
+IMPORT_MAX_ERRORS = 1000
+SUMMARY_LIMIT = 200
+# Search snippets mark matches with control characters, which cannot occur in typed comments,
+# so the page can escape the text before turning them into Markdown
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+
+def _migrate_legacy_attachments(conn: sqlite3.Connection) -> None:
+    """
+    Copy files saved before the attachments table (their paths "; "-joined in feedback.attachments,
+    written to data/<filename>) into the content-addressed store and link them. Paths that no
+    longer exist are left in the text column; the original files are not deleted.
+    """
+    rows = conn.execute(
+        "SELECT id, attachments FROM feedback WHERE IFNULL(attachments, '') != '' "
+        "AND id NOT IN (SELECT feedback_id FROM attachments)"
+    ).fetchall()
+    for feedback_id, paths in rows:
+        blobs = []
+        for entry in paths.split(";"):
+            entry = entry.strip()
+            if not entry:
+                continue
+            path = Path(entry)
+            if not path.is_file():
+                path = DB_PATH.parent / path.name
+            if not path.is_file():
+                continue
+            with open(path, "rb") as f:
+                blobs.append(store_blob(f, path.name))
+        conn.executemany(
+            "INSERT INTO attachments (feedback_id, sha256, filename, size, mime) VALUES (?, ?, ?, ?, ?)",
+            [(feedback_id, sha, name, size, mime) for sha, name, size, mime in blobs],
+        )
+
+
+# Applied in order, once per database; PRAGMA user_version records how many have run.
+# A step is an SQL script or a function of the connection, for data that SQL cannot move.
+# Append new steps; never edit or reorder shipped ones.
+MIGRATIONS = [
+    """
     CREATE TABLE IF NOT EXISTS feedback (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         requisition TEXT,
@@ -19,28 +73,619 @@ def init_db():
         attachments TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
-    """)
-    conn.commit()
-    conn.close()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_feedback_created ON feedback(created_at, id);
+    CREATE INDEX IF NOT EXISTS idx_feedback_requisition ON feedback(requisition, created_at, id);
+    CREATE INDEX IF NOT EXISTS idx_feedback_candidate ON feedback(candidate, created_at, id);
+    CREATE INDEX IF NOT EXISTS idx_feedback_interviewer ON feedback(interviewer, created_at, id)
+    """,
+    # Rating histograms per candidate and per interviewer, kept current by triggers so the
+    # rating statistics never need to scan the feedback table (calibration still joins it)
+    """
+    CREATE TABLE IF NOT EXISTS candidate_summary (
+        requisition TEXT NOT NULL,
+        candidate TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        r1 INTEGER NOT NULL DEFAULT 0, r2 INTEGER NOT NULL DEFAULT 0, r3 INTEGER NOT NULL DEFAULT 0,
+        r4 INTEGER NOT NULL DEFAULT 0, r5 INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (requisition, candidate)
+    );
+    CREATE TABLE IF NOT EXISTS interviewer_summary (
+        interviewer TEXT PRIMARY KEY,
+        n INTEGER NOT NULL DEFAULT 0,
+        r1 INTEGER NOT NULL DEFAULT 0, r2 INTEGER NOT NULL DEFAULT 0, r3 INTEGER NOT NULL DEFAULT 0,
+        r4 INTEGER NOT NULL DEFAULT 0, r5 INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT OR REPLACE INTO candidate_summary (requisition, candidate, n, r1, r2, r3, r4, r5)
+        SELECT IFNULL(requisition, ''), IFNULL(candidate, ''), COUNT(*), SUM(IFNULL(rating = 1, 0)), SUM(IFNULL(rating = 2, 0)), SUM(IFNULL(rating = 3, 0)), SUM(IFNULL(rating = 4, 0)), SUM(IFNULL(rating = 5, 0))
+        FROM feedback GROUP BY 1, 2;
+    INSERT OR REPLACE INTO interviewer_summary (interviewer, n, r1, r2, r3, r4, r5)
+        SELECT IFNULL(interviewer, ''), COUNT(*), SUM(IFNULL(rating = 1, 0)), SUM(IFNULL(rating = 2, 0)), SUM(IFNULL(rating = 3, 0)), SUM(IFNULL(rating = 4, 0)), SUM(IFNULL(rating = 5, 0))
+        FROM feedback GROUP BY 1;
+    CREATE TRIGGER IF NOT EXISTS feedback_summary_ai AFTER INSERT ON feedback BEGIN
+        INSERT OR IGNORE INTO candidate_summary (requisition, candidate) VALUES (IFNULL(NEW.requisition, ''), IFNULL(NEW.candidate, ''));
+        INSERT OR IGNORE INTO interviewer_summary (interviewer) VALUES (IFNULL(NEW.interviewer, ''));
+        UPDATE candidate_summary SET n = n + 1, r1 = r1 + IFNULL(NEW.rating = 1, 0), r2 = r2 + IFNULL(NEW.rating = 2, 0), r3 = r3 + IFNULL(NEW.rating = 3, 0), r4 = r4 + IFNULL(NEW.rating = 4, 0), r5 = r5 + IFNULL(NEW.rating = 5, 0)
+            WHERE requisition = IFNULL(NEW.requisition, '') AND candidate = IFNULL(NEW.candidate, '');
+        UPDATE interviewer_summary SET n = n + 1, r1 = r1 + IFNULL(NEW.rating = 1, 0), r2 = r2 + IFNULL(NEW.rating = 2, 0), r3 = r3 + IFNULL(NEW.rating = 3, 0), r4 = r4 + IFNULL(NEW.rating = 4, 0), r5 = r5 + IFNULL(NEW.rating = 5, 0)
+            WHERE interviewer = IFNULL(NEW.interviewer, '');
+    END;
+    CREATE TRIGGER IF NOT EXISTS feedback_summary_ad AFTER DELETE ON feedback BEGIN
+        UPDATE candidate_summary SET n = n - 1, r1 = r1 - IFNULL(OLD.rating = 1, 0), r2 = r2 - IFNULL(OLD.rating = 2, 0), r3 = r3 - IFNULL(OLD.rating = 3, 0), r4 = r4 - IFNULL(OLD.rating = 4, 0), r5 = r5 - IFNULL(OLD.rating = 5, 0)
+            WHERE requisition = IFNULL(OLD.requisition, '') AND candidate = IFNULL(OLD.candidate, '');
+        UPDATE interviewer_summary SET n = n - 1, r1 = r1 - IFNULL(OLD.rating = 1, 0), r2 = r2 - IFNULL(OLD.rating = 2, 0), r3 = r3 - IFNULL(OLD.rating = 3, 0), r4 = r4 - IFNULL(OLD.rating = 4, 0), r5 = r5 - IFNULL(OLD.rating = 5, 0)
+            WHERE interviewer = IFNULL(OLD.interviewer, '');
+    END;
+    CREATE TRIGGER IF NOT EXISTS feedback_summary_au AFTER UPDATE OF requisition, candidate, interviewer, rating ON feedback BEGIN
+        UPDATE candidate_summary SET n = n - 1, r1 = r1 - IFNULL(OLD.rating = 1, 0), r2 = r2 - IFNULL(OLD.rating = 2, 0), r3 = r3 - IFNULL(OLD.rating = 3, 0), r4 = r4 - IFNULL(OLD.rating = 4, 0), r5 = r5 - IFNULL(OLD.rating = 5, 0)
+            WHERE requisition = IFNULL(OLD.requisition, '') AND candidate = IFNULL(OLD.candidate, '');
+        UPDATE interviewer_summary SET n = n - 1, r1 = r1 - IFNULL(OLD.rating = 1, 0), r2 = r2 - IFNULL(OLD.rating = 2, 0), r3 = r3 - IFNULL(OLD.rating = 3, 0), r4 = r4 - IFNULL(OLD.rating = 4, 0), r5 = r5 - IFNULL(OLD.rating = 5, 0)
+            WHERE interviewer = IFNULL(OLD.interviewer, '');
+        INSERT OR IGNORE INTO candidate_summary (requisition, candidate) VALUES (IFNULL(NEW.requisition, ''), IFNULL(NEW.candidate, ''));
+        INSERT OR IGNORE INTO interviewer_summary (interviewer) VALUES (IFNULL(NEW.interviewer, ''));
+        UPDATE candidate_summary SET n = n + 1, r1 = r1 + IFNULL(NEW.rating = 1, 0), r2 = r2 + IFNULL(NEW.rating = 2, 0), r3 = r3 + IFNULL(NEW.rating = 3, 0), r4 = r4 + IFNULL(NEW.rating = 4, 0), r5 = r5 + IFNULL(NEW.rating = 5, 0)
+            WHERE requisition = IFNULL(NEW.requisition, '') AND candidate = IFNULL(NEW.candidate, '');
+        UPDATE interviewer_summary SET n = n + 1, r1 = r1 + IFNULL(NEW.rating = 1, 0), r2 = r2 + IFNULL(NEW.rating = 2, 0), r3 = r3 + IFNULL(NEW.rating = 3, 0), r4 = r4 + IFNULL(NEW.rating = 4, 0), r5 = r5 + IFNULL(NEW.rating = 5, 0)
+            WHERE interviewer = IFNULL(NEW.interviewer, '');
+    END
+    """,
+    # Full-text index over comments; external content, so the text itself is stored only once
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(
+        comments, content='feedback', content_rowid='id', tokenize='porter unicode61'
+    );
+    INSERT INTO feedback_fts(feedback_fts) VALUES ('rebuild');
+    CREATE TRIGGER IF NOT EXISTS feedback_fts_ai AFTER INSERT ON feedback BEGIN
+        INSERT INTO feedback_fts(rowid, comments) VALUES (NEW.id, NEW.comments);
+    END;
+    CREATE TRIGGER IF NOT EXISTS feedback_fts_ad AFTER DELETE ON feedback BEGIN
+        INSERT INTO feedback_fts(feedback_fts, rowid, comments) VALUES ('delete', OLD.id, OLD.comments);
+    END;
+    CREATE TRIGGER IF NOT EXISTS feedback_fts_au AFTER UPDATE OF comments ON feedback BEGIN
+        INSERT INTO feedback_fts(feedback_fts, rowid, comments) VALUES ('delete', OLD.id, OLD.comments);
+        INSERT INTO feedback_fts(rowid, comments) VALUES (NEW.id, NEW.comments);
+    END
+    """,
+    # Natural key for imported rows so re-running an import never duplicates them
+    """
+    ALTER TABLE feedback ADD COLUMN source_key TEXT;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_feedback_source_key ON feedback(source_key) WHERE source_key IS NOT NULL
+    """,
+    # Attachments live in the content-addressed store (utils.attachments); this links them to feedback
+    """
+    CREATE TABLE IF NOT EXISTS attachments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        feedback_id INTEGER NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
+        sha256 TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mime TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_attachments_feedback ON attachments(feedback_id);
+    CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments(sha256)
+    """,
+    # Lets the unfiltered candidate summary read its best-first top rows straight off an index
+    """
+    CREATE INDEX IF NOT EXISTS idx_candidate_summary_mean ON candidate_summary(
+        ((r1 + 2 * r2 + 3 * r3 + 4 * r4 + 5 * r5) * 1.0 / NULLIF(r1 + r2 + r3 + r4 + r5, 0)) DESC, requisition, candidate
+    )
+    """,
+    _migrate_legacy_attachments,
+    # Entries saved before insert_feedback stripped its keys; the summary triggers follow the update
+    """
+    UPDATE feedback SET
+        requisition = TRIM(requisition, ' ' || char(9) || char(10) || char(13)),
+        candidate = TRIM(candidate, ' ' || char(9) || char(10) || char(13)),
+        interviewer = TRIM(interviewer, ' ' || char(9) || char(10) || char(13))
+    WHERE requisition != TRIM(requisition, ' ' || char(9) || char(10) || char(13))
+       OR candidate != TRIM(candidate, ' ' || char(9) || char(10) || char(13))
+       OR interviewer != TRIM(interviewer, ' ' || char(9) || char(10) || char(13))
+    """,
+]
+
+_pool: Optional["_ConnectionPool"] = None
+_pool_lock = threading.Lock()
+
+
+class _ConnectionPool:
+    """
+    A small pool of SQLite connections in WAL mode shared by all Streamlit sessions.
+    Connections are handed to one thread at a time, so check_same_thread is relaxed.
+    """
+
+    def __init__(self, path: Path, size: int = POOL_SIZE):
+        self.path = Path(path)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # NORMAL is durable across application crashes in WAL mode; only a power cut can lose the last commits
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -16000")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
 
+def _migrate(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for i, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        if callable(step):
+            conn.execute("BEGIN")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {i}")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        else:
+            conn.executescript(f"BEGIN; {step}; PRAGMA user_version = {i}; COMMIT;")
 
-def insert_feedback(req: str, cand: str, interviewer: str, rating: int, comments: str, attachments: str = "") -> int:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO feedback (requisition, candidate, interviewer, rating, comments, attachments)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (req, cand, interviewer, rating, comments, attachments))
-    conn.commit()
-    row_id = c.lastrowid
-    conn.close()
-    return row_id
+
+def _get_pool() -> _ConnectionPool:
+    global _pool
+    if _pool is not None and _pool.path == DB_PATH:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            pool = _ConnectionPool(DB_PATH)
+            with pool.connection() as conn:
+                _migrate(conn)
+            _pool = pool
+    return _pool
+
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled connection; commits on success, rolls back on error."""
+    with _get_pool().connection() as conn:
+        yield conn
+
+
+def init_db():
+    # Schema migrations run once per process when the pool is first created; later calls are free
+    _get_pool()
+
+
+def insert_feedback(req: str, cand: str, interviewer: str, rating: int, comments: str, attachments: str = "",
+                    blobs: Optional[List[Tuple[str, str, int, Optional[str]]]] = None) -> int:
+    """
+    Insert one feedback entry. `blobs` are (sha256, filename, size, mime) tuples for files
+    already written to the attachment store; they are linked in the same transaction.
+    The `attachments` text column is kept only for entries saved before the attachments table.
+    Requisition, candidate and interviewer are stripped, as the filters and summaries match them exactly.
+    """
+    req, cand, interviewer = (v.strip() if v else v for v in (req, cand, interviewer))
+    with connection() as conn:
+        c = conn.execute("""
+            INSERT INTO feedback (requisition, candidate, interviewer, rating, comments, attachments)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (req, cand, interviewer, rating, comments, attachments))
+        row_id = c.lastrowid
+        if blobs:
+            conn.executemany(
+                "INSERT INTO attachments (feedback_id, sha256, filename, size, mime) VALUES (?, ?, ?, ?, ?)",
+                [(row_id, sha, name, size, mime) for sha, name, size, mime in blobs],
+            )
+        return row_id
+
+
+def list_attachments(feedback_id: int) -> List[Tuple]:
+    """(id, sha256, filename, size, mime, created_at) for one feedback entry."""
+    with connection() as conn:
+        return conn.execute(
+            "SELECT id, sha256, filename, size, mime, created_at FROM attachments WHERE feedback_id = ? ORDER BY id",
+            (feedback_id,),
+        ).fetchall()
+
+
+def attachment_counts(feedback_ids: List[int]) -> Dict[int, int]:
+    if not feedback_ids:
+        return {}
+    marks = ", ".join("?" for _ in feedback_ids)
+    with connection() as conn:
+        return dict(conn.execute(
+            f"SELECT feedback_id, COUNT(*) FROM attachments WHERE feedback_id IN ({marks}) GROUP BY feedback_id",
+            list(feedback_ids),
+        ).fetchall())
 
 
 def fetch_all() -> List[Tuple]:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, requisition, candidate, interviewer, rating, comments, attachments, created_at FROM feedback ORDER BY created_at DESC")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    with connection() as conn:
+        c = conn.execute(f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback ORDER BY created_at DESC, id DESC")
+        return c.fetchall()
+
+
+def _where(
+    requisition: Optional[str] = None,
+    candidate: Optional[str] = None,
+    interviewer: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+) -> Tuple[str, List[Any]]:
+    """
+    Build a WHERE clause from optional filters. Dates are inclusive 'YYYY-MM-DD' strings
+    (or date objects) compared against the UTC created_at timestamp.
+    """
+    clauses, params = [], []
+    for col, val in (("requisition", requisition), ("candidate", candidate), ("interviewer", interviewer)):
+        if val:
+            clauses.append(f"{col} = ?")
+            params.append(val.strip())
+    if date_from:
+        clauses.append("created_at >= ?")
+        params.append(str(date_from))
+    if date_to:
+        clauses.append("created_at < date(?, '+1 day')")
+        params.append(str(date_to))
+    if min_rating is not None:
+        clauses.append("rating >= ?")
+        params.append(int(min_rating))
+    if max_rating is not None:
+        clauses.append("rating <= ?")
+        params.append(int(max_rating))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query_feedback(after: Optional[Tuple[str, int]] = None, limit: int = PAGE_SIZE, **filters) -> Tuple[List[Tuple], Optional[Tuple[str, int]]]:
+    """
+    One page of feedback, newest first, using keyset pagination on (created_at, id).
+    Pass the returned cursor as `after` to get the next page; it is None on the last page.
+    Filters are those accepted by _where (requisition, candidate, interviewer, date range, rating range).
+    """
+    where, params = _where(**filters)
+    if after is not None:
+        where += (" AND " if where else " WHERE ") + "(created_at, id) < (?, ?)"
+        params += list(after)
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback{where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1][7], rows[-1][0])
+    return rows, None
+
+
+def count_feedback(**filters) -> int:
+    where, params = _where(**filters)
+    with connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM feedback{where}", params).fetchone()[0]
+
+
+def _rating_stats(counts: List[int]) -> Dict[str, Any]:
+    # counts[i] is the number of ratings equal to i + 1
+    n = sum(counts)
+    if not n:
+        return {"ratings": 0, "mean": None, "median": None, "min": None, "max": None}
+    mean = sum((i + 1) * c for i, c in enumerate(counts)) / n
+
+    def nth(k: int) -> int:
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen > k:
+                return i + 1
+        return len(counts)
+
+    median = (nth((n - 1) // 2) + nth(n // 2)) / 2
+    present = [i + 1 for i, c in enumerate(counts) if c]
+    return {"ratings": n, "mean": round(mean, 2), "median": median, "min": present[0], "max": present[-1]}
+
+
+# Mean of the valid (1-5) ratings in a histogram row; NULL when there are none
+_MEAN_SQL = "(r1 + 2 * r2 + 3 * r3 + 4 * r4 + 5 * r5) * 1.0 / NULLIF(r1 + r2 + r3 + r4 + r5, 0)"
+
+
+def candidate_summary(requisition: Optional[str] = None, limit: int = SUMMARY_LIMIT) -> List[Dict[str, Any]]:
+    """Count/mean/median/min/max rating per (requisition, candidate), best mean first, at most `limit` rows."""
+    sql = "SELECT requisition, candidate, n, r1, r2, r3, r4, r5 FROM candidate_summary WHERE n > 0"
+    params: List[Any] = []
+    if requisition:
+        sql += " AND requisition = ?"
+        params.append(requisition.strip())
+    # NULL means sort last under DESC; the expression matches idx_candidate_summary_mean
+    sql += f" ORDER BY {_MEAN_SQL} DESC, requisition, candidate LIMIT ?"
+    params.append(limit)
+    with connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{"requisition": r[0], "candidate": r[1], "entries": r[2], **_rating_stats(list(r[3:]))} for r in rows]
+
+
+def requisition_summary() -> List[Dict[str, Any]]:
+    """Rating statistics per requisition, rolled up from the candidate histograms."""
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT requisition, COUNT(*), SUM(n), SUM(r1), SUM(r2), SUM(r3), SUM(r4), SUM(r5)
+            FROM candidate_summary WHERE n > 0 GROUP BY requisition ORDER BY requisition
+        """).fetchall()
+    return [{"requisition": r[0], "candidates": r[1], "entries": r[2], **_rating_stats(list(r[3:]))} for r in rows]
+
+
+def interviewer_summary(requisition: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Rating statistics per interviewer plus calibration against the panel: leniency is the
+    interviewer's mean deviation from each candidate's average rating (positive = generous),
+    spread is the standard deviation of those deviations. Only candidates seen by more than
+    one interviewer count towards calibration.
+
+    Calibration joins every rating to its candidate's mean, so across all requisitions it reads
+    the whole feedback table; pass `requisition` to limit it (and the statistics) to that
+    requisition's rows via its index.
+    """
+    cal_sql = f"""
+        WITH c AS (
+            SELECT requisition, candidate, {_MEAN_SQL} AS mean
+            FROM candidate_summary
+            WHERE n > 1 AND r1 + r2 + r3 + r4 + r5 > 0{" AND requisition = ?" if requisition else ""}
+        )
+        SELECT IFNULL(f.interviewer, ''), COUNT(*), AVG(f.rating - c.mean), AVG((f.rating - c.mean) * (f.rating - c.mean))
+        FROM feedback f
+        JOIN c ON c.requisition = IFNULL(f.requisition, '') AND c.candidate = IFNULL(f.candidate, '')
+        WHERE f.rating BETWEEN 1 AND 5{" AND f.requisition = ?" if requisition else ""}
+        GROUP BY 1
+    """
+    with connection() as conn:
+        if requisition:
+            requisition = requisition.strip()
+            rows = conn.execute("""
+                SELECT IFNULL(interviewer, ''), COUNT(*), SUM(IFNULL(rating = 1, 0)), SUM(IFNULL(rating = 2, 0)),
+                       SUM(IFNULL(rating = 3, 0)), SUM(IFNULL(rating = 4, 0)), SUM(IFNULL(rating = 5, 0))
+                FROM feedback WHERE requisition = ? GROUP BY 1 ORDER BY 1
+            """, (requisition,)).fetchall()
+            calibration = {r[0]: r[1:] for r in conn.execute(cal_sql, (requisition, requisition))}
+        else:
+            rows = conn.execute("SELECT interviewer, n, r1, r2, r3, r4, r5 FROM interviewer_summary WHERE n > 0 ORDER BY interviewer").fetchall()
+            calibration = {r[0]: r[1:] for r in conn.execute(cal_sql)}
+    out = []
+    for r in rows:
+        cal = calibration.get(r[0])
+        leniency = spread = None
+        if cal:
+            _, mean_dev, mean_sq = cal
+            leniency = round(mean_dev, 2)
+            spread = round(max(0.0, mean_sq - mean_dev * mean_dev) ** 0.5, 2)
+        out.append({"interviewer": r[0], "entries": r[1], **_rating_stats(list(r[2:])), "leniency": leniency, "spread": spread})
+    return out
+
+
+def _fts_query(text: str) -> str:
+    # Quote every word so user input can never be parsed as FTS5 syntax; the last word
+    # is a prefix match so results appear while typing
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_feedback(text: str, limit: int = 20, **filters) -> List[Tuple]:
+    """
+    Ranked (BM25) full-text search over comments. Returns (id, requisition, candidate,
+    interviewer, rating, created_at, snippet) with matches in the snippet wrapped in
+    HIGHLIGHT_START / HIGHLIGHT_END.
+    Accepts the same filters as query_feedback.
+    """
+    query = _fts_query(text)
+    if not query:
+        return []
+    where, params = _where(**filters)
+    where = where.replace(" WHERE ", " AND ", 1)
+    with connection() as conn:
+        return conn.execute(f"""
+            SELECT f.id, f.requisition, f.candidate, f.interviewer, f.rating, f.created_at,
+                   snippet(feedback_fts, 0, ?, ?, ' … ', 16)
+            FROM feedback_fts JOIN feedback f ON f.id = feedback_fts.rowid
+            WHERE feedback_fts MATCH ?{where}
+            ORDER BY bm25(feedback_fts)
+            LIMIT ?
+        """, [HIGHLIGHT_START, HIGHLIGHT_END, query] + params + [limit]).fetchall()
+
+
+def iter_feedback(chunk_size: int = EXPORT_CHUNK_ROWS, **filters) -> Iterator[List[Tuple]]:
+    """Yield filtered feedback rows oldest-first in chunks straight off a cursor."""
+    where, params = _where(**filters)
+    with connection() as conn:
+        cur = conn.execute(f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback{where} ORDER BY created_at, id", params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+
+def iter_export(fmt: str = "csv", **filters) -> Iterator[bytes]:
+    """
+    Encode the filtered feedback log as CSV (with header) or JSONL, one chunk of rows
+    at a time, so memory stays flat however large the table is.
+    """
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if fmt == "csv":
+        writer.writerow(FEEDBACK_COLUMNS)
+    for rows in iter_feedback(**filters):
+        if fmt == "csv":
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                buf.write(json.dumps(dict(zip(FEEDBACK_COLUMNS, row)), ensure_ascii=False))
+                buf.write("\n")
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def export_feedback(dest, fmt: str = "csv", **filters) -> int:
+    """Stream an export into a binary file object or path; returns bytes written."""
+    own = not hasattr(dest, "write")
+    f = open(dest, "wb") if own else dest
+    written = 0
+    try:
+        for chunk in iter_export(fmt, **filters):
+            f.write(chunk)
+            written += len(chunk)
+    finally:
+        if own:
+            f.close()
+    return written
+
+
+_TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d")
+
+
+def _parse_timestamp(value: str) -> str:
+    value = value.strip().rstrip("Z")
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised created_at '{value}' (expected YYYY-MM-DD[ HH:MM[:SS]])")
+
+
+def _validate_row(row: Dict[str, Any]) -> Tuple:
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    text = {k: ("" if row.get(k) is None else str(row.get(k)).strip()) for k in FEEDBACK_COLUMNS}
+    for col in ("requisition", "candidate", "interviewer"):
+        if not text[col]:
+            raise ValueError(f"missing {col}")
+    try:
+        value = float(text["rating"])
+    except ValueError:
+        raise ValueError(f"rating '{text['rating']}' is not a number")
+    if not value.is_integer():
+        # Also rejects inf/nan, which int() cannot convert
+        raise ValueError(f"rating '{text['rating']}' is not a whole number")
+    rating = int(value)
+    if not 1 <= rating <= 5:
+        raise ValueError(f"rating {rating} is outside 1-5")
+    created_at = _parse_timestamp(text["created_at"]) if text["created_at"] else None
+    source_key = None
+    # Without a timestamp or source id, two identical rows may be two genuine ratings, so only
+    # rows that can be told apart get a natural key
+    if created_at or text["id"]:
+        key_src = "\x1f".join([text["id"], text["requisition"], text["candidate"], text["interviewer"], created_at or "", text["comments"]])
+        source_key = hashlib.sha1(key_src.encode("utf-8")).hexdigest()
+    return (text["requisition"], text["candidate"], text["interviewer"], rating, text["comments"], text["attachments"], created_at, source_key)
+
+
+def read_import_file(f, fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily parse an uploaded CSV (with header) or JSONL file of feedback rows. Each row carries
+    its file line number under "__line__" (the last line of a multi-line CSV record) so
+    import_feedback reports errors against the file; blank JSONL lines are skipped.
+    """
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                row["__line__"] = reader.line_num
+                yield row
+        elif fmt == "jsonl":
+            for n, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                # Problems are passed through as rows so import_feedback reports them against this line
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = {"__error__": f"invalid JSON: {e.msg}"}
+                if not isinstance(row, dict):
+                    row = {"__error__": "expected a JSON object"}
+                row["__line__"] = n
+                yield row
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+    finally:
+        text.detach()
+
+
+def import_feedback(rows: Iterable[Dict[str, Any]], batch_size: int = IMPORT_BATCH_ROWS) -> Dict[str, Any]:
+    """
+    Validate and bulk-insert feedback rows (dicts keyed by FEEDBACK_COLUMNS; created_at
+    defaults to now). Rows go in with executemany, one transaction per batch.
+    Rows with a created_at or a source-system id get a natural key (id, requisition, candidate,
+    interviewer, created_at, comments) and are skipped if it is already present; rows with
+    neither are always inserted, so re-importing them duplicates them. The id is only used for
+    the key, never as the row id. Returns inserted/duplicates counts and (line, error) pairs
+    for rejected rows: the row's "__line__" when read_import_file supplied it, otherwise its
+    position counting from 1.
+    """
+    inserted = duplicates = 0
+    errors: List[Tuple[int, str]] = []
+    sql = """
+        INSERT OR IGNORE INTO feedback (requisition, candidate, interviewer, rating, comments, attachments, created_at, source_key)
+        VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+    """
+    with connection() as conn:
+        batch: List[Tuple] = []
+
+        def flush():
+            nonlocal inserted, duplicates
+            if not batch:
+                return
+            added = conn.executemany(sql, batch).rowcount
+            conn.commit()
+            inserted += added
+            duplicates += len(batch) - added
+            batch.clear()
+
+        for n, row in enumerate(rows, start=1):
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("expected a JSON object")
+                n = row.get("__line__", n)
+                if "__error__" in row:
+                    raise ValueError(row["__error__"])
+                batch.append(_validate_row(row))
+            except (ValueError, TypeError, AttributeError, OverflowError) as e:
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append((n, str(e)))
+                continue
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    return {"inserted": inserted, "duplicates": duplicates, "errors": errors}
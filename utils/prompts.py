@@ -0,0 +1,240 @@
+﻿# Prompt templates for every generator. Static text (role, output format, house style) goes in the
+# system message and per-request fields in the user message, so requests share a long prefix that
+# the provider can cache; text shared between related calls (the JD in shortlisting) comes first.
+from string import Template
+from typing import Dict, List
+
+
+class PromptTemplate:
+    """A static system prefix plus a $field user template, both built once at import."""
+
+    def __init__(self, system: str, output: str, body: str, style_label: str = ""):
+        self.prefix = f"{system}\n\nOUTPUT:\n{output.strip()}"
+        self.style_label = style_label
+        self.body = Template(body.strip() + "\n")
+
+    def static(self, style: str = "") -> str:
+        """The system message; the same for every request that uses the same house style."""
+        if not self.style_label:
+            return self.prefix
+        return f"{self.prefix}\n\n{self.style_label}:\n{style.strip()}"
+
+    def messages(self, style: str = "", **fields: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.static(style)},
+            {"role": "user", "content": self.body.substitute(fields)},
+        ]
+
+
+JD = PromptTemplate(
+    system="You are an HR content generator. Output in clean Markdown following the given House Style and Neogen tone.",
+    output="""
+Create a Job Description in Neogen House Style from the role details in the user message.
+FORMAT: Use clear headings, bullet lists, and concise, inclusive language.
+""",
+    style_label="HOUSE_STYLE",
+    body="""
+Job Title: $job_title
+Department/Function: $department
+Location: $location
+Work Pattern: $work_pattern
+Level: $level
+Travel: $travel
+
+Role Purpose:
+$role_purpose
+
+Key Responsibilities:
+$key_resps
+
+Required Qualifications:
+$req_quals
+
+Preferred Qualifications:
+$pref_quals
+
+Competencies:
+$comps
+""",
+)
+
+ADVERT = PromptTemplate(
+    system="You write concise, compelling job adverts in Neogen style.",
+    output="A polished job advert in Markdown, with strong hook, clear sections, inclusive language, and a bold call-to-action.",
+    style_label="HOUSE_STYLE_ADVERT",
+    body="""
+JOB_TITLE: $job_title
+LOCATION: $location
+COMPENSATION: $salary_notes
+APPLY_LINK: $apply_link
+
+EXTRA_OPTIONS:
+$extra_opts
+
+SOURCE_JD:
+$jd_text
+""",
+)
+
+GUIDE = PromptTemplate(
+    system="You produce structured interview guides with sections, suggested timings, and evaluation rubrics.",
+    output="""
+A structured guide with:
+- Opening script
+- Section timings
+- Behavioral & technical questions mapped to competencies
+- Score rubric (1–5) and red flags
+- Closing & next steps
+Format in Markdown, concise and practical.
+""",
+    body="""
+JOB_TITLE: $job_title
+SENIORITY: $seniority
+DURATION: $duration
+
+KEY_COMPETENCIES:
+$key_competencies
+
+CUSTOM_NOTES:
+$custom_notes
+
+JD_CONTEXT (optional):
+$jd_text
+""",
+)
+
+QUESTIONS = PromptTemplate(
+    system="You write sharp, bias-aware interview questions with sample strong/weak answers and scoring.",
+    output="""
+For each focus area, provide:
+- 5 targeted questions
+- What good looks like (bullet points)
+- Pitfalls/red flags
+- Score rubric 1–5
+Format as Markdown with clear headings.
+""",
+    body="""
+JOB_TITLE: $job_title
+SENIORITY: $seniority
+FOCUS_AREAS: $focus
+
+CUSTOM:
+$custom
+
+JD_CONTEXT:
+$jd_text
+""",
+)
+
+TOOLKIT = PromptTemplate(
+    system="You produce pragmatic hiring toolkits: playbook, onboarding checklist, roles & expectations.",
+    output="""
+A Hiring Manager Toolkit for the role in the user message. Deliver:
+1) Hiring Manager Playbook (stages, SLAs, anti-bias guidance, decision criteria)
+2) IT Onboarding Instructions (systems access, hardware, timeline)
+3) Expectations of all parties (HM, TA, Interviewers, Candidate)
+Short, bullet-led, Markdown.
+""",
+    body="""
+Role: $job_title
+Region: $region
+Systems: $stack
+
+Notes:
+$notes
+""",
+)
+
+SHORTLIST_SYSTEM = "You are an expert TA partner generating concise, decision-ready shortlists."
+
+# The shortlist prompts put the JD and focus areas (shared by every call in a run) before the candidates
+SHORTLIST_MAP = PromptTemplate(
+    system=SHORTLIST_SYSTEM,
+    output="""
+A compact candidate card (max 150 words) assessed against the JD, exactly these fields:
+Candidate: (the candidate name exactly as given)
+Years Experience:
+Key Skills:
+Notable Companies:
+Strengths:
+Risks/Gaps:
+Salary/Level Fit (guess):
+Overall Rating (1-5):
+Tone: neutral, evidence-based. No preamble.
+""",
+    body="""
+JOB_DESCRIPTION:
+$jd_text
+
+FOCUS_AREAS:
+$focus
+
+CANDIDATE: $name
+CV:
+$cv_text
+""",
+)
+
+SHORTLIST_GROUP = PromptTemplate(
+    system=SHORTLIST_SYSTEM,
+    output="""
+Rank every candidate against the role, best first. One line per candidate:
+Candidate | Overall Rating (1-5) | Years Experience | Key Skills | Main Strength | Main Risk
+Keep every candidate name exactly as given. No preamble.
+""",
+    body="""
+JOB_DESCRIPTION:
+$jd_text
+
+FOCUS_AREAS:
+$focus
+
+CANDIDATE_CARDS:
+$cards
+""",
+)
+
+SHORTLIST_REDUCE = PromptTemplate(
+    system=SHORTLIST_SYSTEM,
+    output="""
+1) Executive Summary (5-8 bullet points)
+2) Comparison Table (CSV-friendly): Candidate, Strengths, Risks/Gaps, Years Experience, Key Skills, Notable Companies, Salary/Level Fit (guess), Overall Rating (1-5)
+3) Recommendation: Who to proceed with and why
+Tone: crisp, neutral, evidence-based. Keep table compact.
+""",
+    body="""
+JOB_DESCRIPTION:
+$jd_text
+
+FOCUS_AREAS:
+$focus
+
+CANDIDATE_SUMMARIES:
+$cards
+""",
+)
+
+
+def jd_messages(style: str, job_title: str, department: str, location: str, work_pattern: str, level: str, travel: str,
+                role_purpose: str, key_resps: str, req_quals: str, pref_quals: str, comps: str) -> List[Dict[str, str]]:
+    return JD.messages(style, job_title=job_title, department=department, location=location, work_pattern=work_pattern,
+                       level=level, travel=travel, role_purpose=role_purpose, key_resps=key_resps,
+                       req_quals=req_quals, pref_quals=pref_quals, comps=comps)
+
+
+def advert_messages(style: str, job_title: str, location: str, salary_notes: str, apply_link: str, jd_text: str, extra_opts: str) -> List[Dict[str, str]]:
+    return ADVERT.messages(style, job_title=job_title, location=location, salary_notes=salary_notes,
+                           apply_link=apply_link, jd_text=jd_text, extra_opts=extra_opts)
+
+
+def guide_messages(job_title: str, seniority: str, duration: str, key_competencies: str, jd_text: str, custom_notes: str) -> List[Dict[str, str]]:
+    return GUIDE.messages(job_title=job_title, seniority=seniority, duration=duration,
+                          key_competencies=key_competencies, jd_text=jd_text, custom_notes=custom_notes)
+
+
+def questions_messages(job_title: str, seniority: str, focus: List[str], jd_text: str, custom: str) -> List[Dict[str, str]]:
+    return QUESTIONS.messages(job_title=job_title, seniority=seniority, focus=", ".join(focus), jd_text=jd_text, custom=custom)
+
+
+def toolkit_messages(job_title: str, region: str, stack: str, notes: str) -> List[Dict[str, str]]:
+    return TOOLKIT.messages(job_title=job_title, region=region, stack=stack, notes=notes)
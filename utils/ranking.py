@@ -0,0 +1,58 @@
+﻿import re
+from typing import List, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a an and are as at be been by for from has have in into is it its of on or our that the their this to was were will with
+you your we they he she i me my us not but if so than then there these those which who whom what when where how all any
+can may must should would could also per via etc
+""".split())
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased word unigrams and bigrams, stopwords removed."""
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def similarity_scores(query: str, docs: List[str]) -> np.ndarray:
+    """
+    TF-IDF cosine similarity of each doc to the query, in doc order (0.0 for empty docs).
+    IDF is computed over query + docs; TF is sublinear (1 + log tf). Everything after
+    tokenising is vectorised over flat (doc, term) arrays, so memory grows with the
+    total number of terms rather than docs x vocabulary.
+    """
+    per_doc = [terms(query)] + [terms(d) for d in docs]
+    lengths = np.fromiter((len(t) for t in per_doc), dtype=np.int64, count=len(per_doc))
+    if lengths[0] == 0 or lengths.sum() == 0:
+        return np.zeros(len(docs))
+    # A dict interns terms far faster than np.unique can sort a string array
+    vocab: dict = {}
+    term_ids = np.fromiter((vocab.setdefault(t, len(vocab)) for ts in per_doc for t in ts), dtype=np.int64, count=int(lengths.sum()))
+    doc_ids = np.repeat(np.arange(len(per_doc)), lengths)
+
+    # One row per distinct (doc, term) with its count
+    pairs, tf = np.unique(doc_ids * len(vocab) + term_ids, return_counts=True)
+    pair_doc, pair_term = np.divmod(pairs, len(vocab))
+
+    df = np.bincount(pair_term, minlength=len(vocab))
+    idf = np.log((1 + len(per_doc)) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(tf)) * idf[pair_term]
+    norms = np.sqrt(np.bincount(pair_doc, weights=weights ** 2, minlength=len(per_doc)))
+
+    query_vec = np.zeros(len(vocab))
+    in_query = pair_doc == 0
+    query_vec[pair_term[in_query]] = weights[in_query] / norms[0]
+    dots = np.bincount(pair_doc, weights=weights * query_vec[pair_term], minlength=len(per_doc))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(norms > 0, dots / norms, 0.0)
+    return scores[1:]
+
+
+def rank(query: str, named_docs: List[Tuple[str, str]]) -> List[Tuple[int, float]]:
+    """(index into named_docs, score) pairs, best match first."""
+    scores = similarity_scores(query, [text for _, text in named_docs])
+    order = np.argsort(-scores, kind="stable")
+    return [(int(i), float(scores[i])) for i in order]
@@ -0,0 +1,147 @@
+﻿import os
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Callable, Iterator
+
+from utils.llm import BATCH_MAX_WORKERS, chat_complete_many, chat_stream
+from utils.parsers import UPLOAD_MAX_PAGES, extract_many_bytes
+from utils.ranking import rank
+from utils.budget import char_budget, compact, count_tokens, remaining_budget
+from utils.prompts import SHORTLIST_MAP, SHORTLIST_GROUP, SHORTLIST_REDUCE
+
+MAP_MAX_TOKENS = 450
+REDUCE_GROUP_SIZE = 12
+GROUP_MAX_TOKENS = 900
+# CVs forwarded to the model after local TF-IDF pre-ranking; 0 sends every CV
+DEFAULT_TOP_K = int(os.getenv("NEOGEN_SHORTLIST_TOP_K", 20))
+
+
+def map_messages(jd_text: str, name: str, cv_text: str, focus: str) -> List[Dict[str, str]]:
+    return SHORTLIST_MAP.messages(jd_text=jd_text, focus=focus, name=name, cv_text=cv_text)
+
+
+def group_messages(jd_text: str, cards: List[str], focus: str) -> List[Dict[str, str]]:
+    return SHORTLIST_GROUP.messages(jd_text=jd_text, focus=focus, cards="\n\n---\n\n".join(cards))
+
+
+def reduce_messages(jd_text: str, cards: List[str], focus: str) -> List[Dict[str, str]]:
+    return SHORTLIST_REDUCE.messages(jd_text=jd_text, focus=focus, cards="\n\n---\n\n".join(cards))
+
+
+def fit_inputs(model: str, jd_text: str, cvs: List[Tuple[str, str]], focus: str) -> Tuple[str, List[Tuple[str, str]], List[str]]:
+    """
+    Compact the JD and every CV so each map prompt fits the model's input budget.
+    The JD may take up to a third of it; each CV gets what is left.
+    Returns the compacted JD and CVs plus one note per document that had to be trimmed.
+    """
+    template = "".join(m["content"] for m in map_messages("", "", "", focus))
+    budget = remaining_budget(model, MAP_MAX_TOKENS, template)
+    notes = []
+    jd_text, report = compact(jd_text, budget // 3, model)
+    if report["trimmed"]:
+        notes.append(f"JD: {report['summary']}")
+    cv_budget = budget - count_tokens(jd_text, model)
+    fitted = []
+    for name, text in cvs:
+        text, report = compact(text, cv_budget, model)
+        if report["trimmed"]:
+            notes.append(f"{name}: {report['summary']}")
+        fitted.append((name, text))
+    return jd_text, fitted, notes
+
+
+def summarise_candidates(
+    model: str,
+    jd_text: str,
+    cvs: List[Tuple[str, str]],
+    focus: str,
+    temperature: float = 0.2,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    use_cache: bool = True,
+    max_workers: int = BATCH_MAX_WORKERS,
+) -> List[str]:
+    """
+    Map step: one compact card per (name, cv_text), generated concurrently.
+    Failed items come back as "[ERROR] ..." cards so the caller can surface them.
+    """
+    reqs = [
+        {"model": model, "messages": map_messages(jd_text, name, text, focus), "temperature": temperature, "max_tokens": MAP_MAX_TOKENS}
+        for name, text in cvs
+    ]
+    results = chat_complete_many(reqs, max_workers=max_workers, use_cache=use_cache, on_progress=on_progress)
+    return [r["text"] if r["error"] is None else f"Candidate: {name}\n{r['text']}" for (name, _), r in zip(cvs, results)]
+
+
+def condense(
+    model: str,
+    jd_text: str,
+    cards: List[str],
+    focus: str,
+    temperature: float = 0.2,
+    group_size: int = REDUCE_GROUP_SIZE,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    use_cache: bool = True,
+    max_workers: int = BATCH_MAX_WORKERS,
+) -> List[str]:
+    """
+    Hierarchical reduction: while there are more than group_size items, rank them in groups
+    (concurrently) and carry each group's ranked digest to the next level.
+    The result is small enough for a single final reduce_messages call.
+    """
+    items = list(cards)
+    while len(items) > group_size:
+        groups = [items[i:i + group_size] for i in range(0, len(items), group_size)]
+        reqs = [
+            {"model": model, "messages": group_messages(jd_text, g, focus), "temperature": temperature, "max_tokens": GROUP_MAX_TOKENS}
+            for g in groups
+        ]
+        results = chat_complete_many(reqs, max_workers=max_workers, use_cache=use_cache, on_progress=on_progress)
+        # Keep the raw cards of a group whose ranking failed rather than dropping its candidates
+        items = [r["text"] if r["error"] is None else "\n\n".join(g) for g, r in zip(groups, results)]
+    return items
+
+
+def run_shortlist(
+    job,
+    model: str,
+    jd_file: Tuple[str, bytes],
+    cv_files: List[Tuple[str, bytes]],
+    focus: str,
+    temperature: float = 0.2,
+    max_tokens: int = 1500,
+    top_k: int = DEFAULT_TOP_K,
+    use_cache: bool = True,
+) -> Iterator[str]:
+    """
+    The whole shortlist pipeline as a background job (see utils.jobs): extract, pre-rank locally,
+    fit to budget, map, condense, then stream the final comparison. Only the top_k CVs by TF-IDF
+    similarity to the JD and focus areas reach the model (0 keeps all). Unreadable CVs, the
+    similarity scores, compaction notes and the candidate cards are recorded with job.note
+    for the page to show next to the result. use_cache=False bypasses the response cache at every stage.
+    """
+    job.progress(0.0, f"Reading {len(cv_files) + 1} documents...")
+    # Every document ends up in a map prompt, so nothing past that budget is worth parsing
+    texts = extract_many_bytes([jd_file] + cv_files, max_pages=UPLOAD_MAX_PAGES, max_chars=char_budget(model, MAP_MAX_TOKENS))
+    jd_text, cv_texts = texts[0], texts[1:]
+    unreadable = [name for (name, _), text in zip(cv_files, cv_texts) if not text.strip()]
+    if unreadable:
+        job.note("unreadable", unreadable)
+    cvs = [(Path(name).stem, text) for (name, _), text in zip(cv_files, cv_texts) if text.strip()]
+    if not cvs:
+        raise ValueError("None of the uploaded CVs could be read.")
+
+    ranked = rank(f"{jd_text}\n{focus}", cvs)
+    keep = ranked[:top_k] if top_k else ranked
+    job.note("scores", [[cvs[i][0], round(score, 4), n < len(keep)] for n, (i, score) in enumerate(ranked)])
+    cvs = [cvs[i] for i, _ in keep]
+
+    jd_text, cvs, budget_notes = fit_inputs(model, jd_text, cvs, focus)
+    if budget_notes:
+        job.note("budget_notes", budget_notes)
+
+    cards = summarise_candidates(model, jd_text, cvs, focus, temperature=temperature, use_cache=use_cache, max_workers=job.batch_workers,
+                                 on_progress=lambda done, total: job.progress(done / total, f"Summarised {done}/{total} candidates"))
+    job.note("cards", cards)
+    summaries = condense(model, jd_text, cards, focus, temperature=temperature, use_cache=use_cache, max_workers=job.batch_workers,
+                         on_progress=lambda done, total: job.progress(done / total, f"Ranking candidate groups {done}/{total}"))
+    job.progress(1.0, "Writing the shortlist...")
+    return chat_stream(model, reduce_messages(jd_text, summaries, focus), temperature=temperature, max_tokens=max_tokens, use_cache=use_cache)
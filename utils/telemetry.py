@@ -0,0 +1,204 @@
+﻿import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+METRICS_PATH = Path("data/llm_metrics.db")
+
+# USD per million tokens: (prompt, cached prompt, completion). List prices when added; override or
+# extend with NEOGEN_LLM_PRICES, e.g. '{"gpt-4o-mini": [0.15, 0.075, 0.6]}'
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+}
+
+log = logging.getLogger(__name__)
+
+
+def _price_overrides(raw: str) -> Dict[str, Tuple[float, float, float]]:
+    # A bad override must not stop utils.llm from importing, so anything malformed is logged and skipped
+    try:
+        prices = json.loads(raw)
+        if not isinstance(prices, dict):
+            raise ValueError("expected a JSON object of model -> [prompt, cached prompt, completion]")
+    except ValueError as e:
+        log.warning("Ignoring NEOGEN_LLM_PRICES: %s", e)
+        return {}
+    out = {}
+    for model, price in prices.items():
+        try:
+            values = tuple(float(x) for x in price)
+            if len(values) != 3:
+                raise ValueError
+        except (TypeError, ValueError):
+            log.warning("Ignoring NEOGEN_LLM_PRICES entry for %s: expected [prompt, cached prompt, completion]", model)
+            continue
+        out[model] = values
+    return out
+
+
+MODEL_PRICES.update(_price_overrides(os.getenv("NEOGEN_LLM_PRICES") or "{}"))
+
+_page: ContextVar[str] = ContextVar("llm_page", default="unknown")
+_conn: Optional[sqlite3.Connection] = None
+_conn_path: Optional[Path] = None
+_lock = threading.Lock()
+
+
+def set_page(name: str) -> None:
+    """Attribute LLM calls made by the current script run (thread) to a tool/page."""
+    _page.set(name)
+
+
+def current_page() -> str:
+    return _page.get()
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn, _conn_path
+    if _conn is None or _conn_path != METRICS_PATH:
+        METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(METRICS_PATH, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            page TEXT,
+            model TEXT,
+            kind TEXT,
+            outcome TEXT,
+            latency_s REAL,
+            ttft_s REAL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            attempts INTEGER,
+            max_tokens INTEGER,
+            cached_tokens INTEGER
+        )
+        """)
+        if "cached_tokens" not in {r[1] for r in conn.execute("PRAGMA table_info(llm_calls)")}:
+            conn.execute("ALTER TABLE llm_calls ADD COLUMN cached_tokens INTEGER")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts)")
+        conn.commit()
+        _conn, _conn_path = conn, METRICS_PATH
+    return _conn
+
+
+def record(
+    kind: str,
+    model: str,
+    outcome: str,
+    latency_s: float,
+    page: Optional[str] = None,
+    ttft_s: Optional[float] = None,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    attempts: int = 1,
+    max_tokens: Optional[int] = None,
+    cached_tokens: Optional[int] = None,
+) -> None:
+    """
+    Store one LLM call. kind is complete/stream/batch; outcome is ok, cache_hit or an
+    LLMError kind; cached_tokens is the part of prompt_tokens the provider served from its
+    prompt cache. Telemetry must never break generation, so failures are swallowed.
+    """
+    try:
+        with _lock:
+            conn = _connect()
+            conn.execute(
+                """INSERT INTO llm_calls (ts, page, model, kind, outcome, latency_s, ttft_s, prompt_tokens, completion_tokens, attempts, max_tokens, cached_tokens)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (time.time(), page or current_page(), model, kind, outcome, latency_s, ttft_s, prompt_tokens, completion_tokens, attempts, max_tokens, cached_tokens),
+            )
+            conn.commit()
+    except Exception:
+        pass
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return round(values[lo] + (values[hi] - values[lo]) * (k - lo), 3)
+
+
+def price(model: Optional[str]) -> Optional[Tuple[float, float, float]]:
+    """Prices for a model, matching dated snapshots (gpt-4o-mini-2024-07-18) by longest prefix; None if unknown."""
+    model = model or ""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model == name or model.startswith(name + "-"):
+            return MODEL_PRICES[name]
+    return None
+
+
+def cost_usd(model: Optional[str], prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    prices = price(model)
+    if prices is None:
+        return None
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * prices[0] + cached_tokens * prices[1] + completion_tokens * prices[2]) / 1e6
+
+
+def summary(since_days: float = 30) -> List[Dict[str, Any]]:
+    """
+    Per (page, model): call count, cache hits, errors, retries, p50/p95 latency and
+    time-to-first-token (cache hits excluded), prompt/completion token totals, the share of
+    prompt tokens served from the provider's prompt cache, and the estimated cost in USD
+    (None for models missing from MODEL_PRICES). Failed attempts are not billed and not costed.
+    """
+    with _lock:
+        rows = _connect().execute(
+            """SELECT page, model, outcome, latency_s, ttft_s, prompt_tokens, completion_tokens, cached_tokens, attempts
+               FROM llm_calls WHERE ts >= ? ORDER BY page, model""",
+            (time.time() - since_days * 86400,),
+        ).fetchall()
+    groups: Dict[tuple, List[tuple]] = {}
+    for r in rows:
+        groups.setdefault((r[0], r[1]), []).append(r)
+    out = []
+    for (page, model), calls in groups.items():
+        live = [c for c in calls if c[2] != "cache_hit"]
+        ok = [c for c in live if c[2] == "ok"]
+        prompt, completion, cached = (sum(c[i] or 0 for c in ok) for i in (5, 6, 7))
+        cost = cost_usd(model, prompt, completion, cached)
+        out.append({
+            "page": page,
+            "model": model,
+            "calls": len(calls),
+            "cache_hits": len(calls) - len(live),
+            "errors": len(live) - len(ok),
+            "retries": sum(max(0, (c[8] or 1) - 1) for c in live),
+            "p50_latency_s": _percentile([c[3] for c in ok], 0.5),
+            "p95_latency_s": _percentile([c[3] for c in ok], 0.95),
+            "p50_ttft_s": _percentile([c[4] for c in ok if c[4] is not None], 0.5),
+            "p95_ttft_s": _percentile([c[4] for c in ok if c[4] is not None], 0.95),
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "cached_tokens": cached,
+            "prompt_cache_rate": round(cached / max(1, prompt), 3),
+            "cost_usd": None if cost is None else round(cost, 4),
+        })
+    return out
+
+
+def recent_calls(limit: int = 200) -> List[tuple]:
+    with _lock:
+        return _connect().execute(
+            """SELECT datetime(ts, 'unixepoch'), page, model, kind, outcome, latency_s, ttft_s, prompt_tokens, cached_tokens, completion_tokens, attempts
+               FROM llm_calls ORDER BY ts DESC LIMIT ?""",
+            (limit,),
+        ).fetchall()